@@ -1,12 +1,31 @@
 """Configuration management for the GitHub screenshot automation system."""
 
+import functools
 import os
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
 
-
-@dataclass
+# Required prefix for PROFILE_URL
+GITHUB_URL_PREFIX = "https://github.com/"
+
+# Environment variables read by Config.from_env (part of the load_config cache key)
+CONFIG_ENV_VARS = (
+    "GITHUB_TOKEN",
+    "GITHUB_USERNAME",
+    "PROFILE_URL",
+    "SCREENSHOT_PATH",
+    "VIEWPORT_WIDTH",
+    "VIEWPORT_HEIGHT",
+    "SCREENSHOT_QUALITY",
+    "DRY_RUN",
+    "LOG_LEVEL",
+    "SCHEDULE_TIME",
+    "TIMEZONE",
+)
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Configuration container for application settings."""
 
@@ -55,6 +74,8 @@ class Config:
         else:
             load_dotenv()
 
+        env = os.environ
+
         # Required variables
         required_vars = {
             "GITHUB_TOKEN": "GitHub personal access token",
@@ -62,10 +83,11 @@ class Config:
             "PROFILE_URL": "GitHub profile URL to screenshot",
         }
 
-        missing_vars = []
-        for var, description in required_vars.items():
-            if not os.getenv(var):
-                missing_vars.append(f"{var} ({description})")
+        missing_vars = [
+            f"{var} ({description})"
+            for var, description in required_vars.items()
+            if not env.get(var)
+        ]
 
         if missing_vars:
             raise ValueError(
@@ -73,25 +95,25 @@ class Config:
                 + "\n".join(f"  - {var}" for var in missing_vars)
             )
 
-        # Validate profile URL
-        profile_url = os.getenv("PROFILE_URL", "")
-        if not profile_url.startswith("https://github.com/"):
+        # Validate profile URL (presence already checked above)
+        profile_url = env["PROFILE_URL"]
+        if not profile_url.startswith(GITHUB_URL_PREFIX):
             raise ValueError(
-                f"PROFILE_URL must start with 'https://github.com/', got: {profile_url}"
+                f"PROFILE_URL must start with '{GITHUB_URL_PREFIX}', got: {profile_url}"
             )
 
         return cls(
-            github_token=os.getenv("GITHUB_TOKEN", ""),
-            github_username=os.getenv("GITHUB_USERNAME", ""),
+            github_token=env["GITHUB_TOKEN"],
+            github_username=env["GITHUB_USERNAME"],
             profile_url=profile_url,
-            screenshot_path=os.getenv("SCREENSHOT_PATH", "screenshots"),
-            viewport_width=int(os.getenv("VIEWPORT_WIDTH", "1920")),
-            viewport_height=int(os.getenv("VIEWPORT_HEIGHT", "1080")),
-            screenshot_quality=int(os.getenv("SCREENSHOT_QUALITY", "90")),
-            dry_run=os.getenv("DRY_RUN", "false").lower() == "true",
-            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
-            schedule_time=os.getenv("SCHEDULE_TIME", "00:00"),
-            timezone=os.getenv("TIMEZONE", "UTC"),
+            screenshot_path=env.get("SCREENSHOT_PATH", "screenshots"),
+            viewport_width=int(env.get("VIEWPORT_WIDTH", "1920")),
+            viewport_height=int(env.get("VIEWPORT_HEIGHT", "1080")),
+            screenshot_quality=int(env.get("SCREENSHOT_QUALITY", "90")),
+            dry_run=env.get("DRY_RUN", "false").lower() == "true",
+            log_level=env.get("LOG_LEVEL", "INFO").upper(),
+            schedule_time=env.get("SCHEDULE_TIME", "00:00"),
+            timezone=env.get("TIMEZONE", "UTC"),
         )
 
     def validate(self) -> None:
@@ -118,8 +140,32 @@ def load_config(env_file: str | None = None) -> Config:
     """
     Load and validate configuration.
 
+    Results are cached per env file, its modification time and the current
+    values of the configuration environment variables, so repeated calls
+    skip re-parsing the .env file until one of them changes.
+
+    Args:
+        env_file: Optional path to .env file
+
+    Returns:
+        Validated Config instance
+    """
+    mtime = os.path.getmtime(env_file) if env_file and os.path.exists(env_file) else 0.0
+    env_snapshot = tuple(os.environ.get(var) for var in CONFIG_ENV_VARS)
+    return _load_config_cached(env_file, mtime, env_snapshot)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(
+    env_file: str | None, mtime: float, env_snapshot: tuple[str | None, ...]
+) -> Config:
+    """
+    Load and validate configuration (memoized by load_config).
+
     Args:
         env_file: Optional path to .env file
+        mtime: Modification time of env_file (cache key only)
+        env_snapshot: Current configuration environment values (cache key only)
 
     Returns:
         Validated Config instance
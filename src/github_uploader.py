@@ -1,20 +1,128 @@
 """GitHub repository uploader module for screenshot storage."""
 
+import asyncio
+import base64
+import email.utils
+import hashlib
 import logging
+import random
 import time
 from pathlib import Path
+from time import sleep
 
-from github import Auth, Github, GithubException, Repository
+from github import Auth, Github, GithubException, InputGitTreeElement, Repository
 
 logger = logging.getLogger("github_screenshot_automation.uploader")
 
+# Upper bound for exponential backoff between upload attempts (seconds)
+MAX_BACKOFF = 60
+
+# Default branch name, head commit and current blob SHAs in a single request;
+# one aliased fileN/$pathN lookup is appended per file
+BRANCH_STATE_QUERY = """
+query($owner: String!, $name: String!{variables}) {{
+  repository(owner: $owner, name: $name) {{
+    defaultBranchRef {{
+      name
+      target {{ oid }}
+    }}{objects}
+  }}
+}}
+"""
+
+# Atomic multi-file commit guarded by the expected branch head
+COMMIT_FILES_MUTATION = """
+mutation($input: CreateCommitOnBranchInput!) {
+  createCommitOnBranch(input: $input) {
+    commit { oid }
+  }
+}
+"""
+
+
+def git_blob_sha(content: bytes) -> str:
+    """
+    Compute the SHA-1 Git assigns to a blob with the given content.
+
+    Args:
+        content: File content
+
+    Returns:
+        Hex blob SHA, comparable with the SHAs reported by the GitHub API
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _retry_after_seconds(value: str) -> float | None:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP-date
+
+    Returns:
+        Seconds to wait, or None if the value cannot be parsed
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _retry_wait_time(error: GithubException, attempt: int) -> float | None:
+    """
+    Work out how long to wait before retrying a failed GitHub request.
+
+    PyGithub's default GithubRetry transport already retries single requests on
+    5xx and rate-limit responses, but not 429 and not PATCH requests such as the
+    ref update that publishes a commit. This covers what reaches the caller: it
+    honors Retry-After, then waits for the rate-limit reset when the quota is
+    exhausted, and otherwise falls back to capped exponential backoff with jitter.
+    A 403 is only retried when it is a rate limit, and a requested wait longer than
+    MAX_BACKOFF is not worth sitting through.
+
+    Args:
+        error: Exception raised by the failed request
+        attempt: Number of the attempt that failed (starting at 1)
+
+    Returns:
+        Seconds to wait, or None if the error is not worth retrying
+    """
+    headers = error.headers or {}
+    rate_limited = "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0"
+    if error.status == 403 and not rate_limited:
+        return None
+    if error.status not in (403, 429) and error.status < 500:
+        return None
+
+    wait = None
+    if "retry-after" in headers:
+        wait = _retry_after_seconds(headers["retry-after"])
+    elif headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+        wait = max(0.0, int(headers["x-ratelimit-reset"]) - time.time())
+
+    if wait is None:
+        return min(MAX_BACKOFF, 2**attempt) + random.uniform(0, 1)
+    return wait if wait <= MAX_BACKOFF else None
+
 
 class GitHubUploader:
     """Handles uploading screenshots to GitHub profile repository."""
 
     PROFILE_REPO = "fUmar3542/fUmar3542"
 
-    def __init__(self, token: str, username: str, max_retries: int = 3):
+    def __init__(
+        self,
+        token: str,
+        username: str,
+        max_retries: int = 3,
+        github: Github | None = None,
+    ):
         """
         Initialize GitHub uploader.
 
@@ -22,12 +130,15 @@ class GitHubUploader:
             token: GitHub personal access token
             username: GitHub username (used for validation)
             max_retries: Maximum number of retry attempts for failed uploads
+            github: Optional existing client to share its connection pool;
+                the caller stays responsible for closing it
         """
         self.token = token
         self.username = username
         self.repo_name = self.PROFILE_REPO
         self.max_retries = max_retries
-        self.github: Github | None = None
+        self.github: Github | None = github
+        self._owns_client = github is None
         self.repo: Repository.Repository | None = None
 
     def connect(self) -> None:
@@ -39,14 +150,11 @@ class GitHubUploader:
         """
         try:
             logger.info("Connecting to GitHub API")
-            auth = Auth.Token(self.token)
-            self.github = Github(auth=auth)
-
-            # Test authentication
-            user = self.github.get_user()
-            logger.info(f"Authenticated as: {user.login}")
+            if self._owns_client:
+                auth = Auth.Token(self.token)
+                self.github = Github(auth=auth)
 
-            # Get repository
+            # Get repository (also verifies the token, no separate user probe)
             logger.info(f"Accessing repository: {self.repo_name}")
             self.repo = self.github.get_repo(self.repo_name)
             logger.info(f"Repository accessed: {self.repo.full_name}")
@@ -59,7 +167,11 @@ class GitHubUploader:
             raise
 
     def upload_screenshot(
-        self, file_path: Path, remote_path: str, commit_message: str | None = None
+        self,
+        file_path: Path,
+        remote_path: str,
+        commit_message: str | None = None,
+        extra_files: dict[str, bytes] | None = None,
     ) -> str:
         """
         Upload screenshot to GitHub profile repository.
@@ -68,6 +180,8 @@ class GitHubUploader:
             file_path: Local path to screenshot file
             remote_path: Remote path in repository (e.g., 'screenshots/screenshot.png')
             commit_message: Optional commit message
+            extra_files: Optional additional file contents keyed by repository path
+                (e.g., {'README.md': b'...'}), committed together with the screenshot
 
         Returns:
             Relative path to uploaded file (e.g., './screenshots/filename.png')
@@ -90,33 +204,36 @@ class GitHubUploader:
         with open(file_path, "rb") as f:
             content = f.read()
 
+        files = {remote_path: content}
+        if extra_files:
+            files.update(extra_files)
+        relative_path = f"./{remote_path}"
+
+        # Fast path: one GraphQL query + one commit for all files, no existence probe
+        try:
+            commit_oid = self._commit_files_graphql(files, commit_message)
+            if commit_oid is None:
+                logger.info("All files unchanged, skipping commit")
+            else:
+                logger.info(f"Commit SHA: {commit_oid[:7]}...")
+            logger.info(f"Upload successful. Relative path: {relative_path}")
+            return relative_path
+        except GithubException as e:
+            logger.warning(f"GraphQL upload failed, falling back to REST: {e}")
+        except ValueError:
+            logger.info("No default branch yet, falling back to REST")
+
         # Retry logic
         for attempt in range(1, self.max_retries + 1):
             try:
-                # Check if file already exists
-                try:
-                    existing_file = self.repo.get_contents(remote_path)
-                    logger.info(f"File exists, updating: {remote_path}")
-                    self.repo.update_file(
-                        path=remote_path,
-                        message=commit_message,
-                        content=content,
-                        sha=existing_file.sha,
-                    )
-                except GithubException as e:
-                    if e.status == 404:
-                        # File doesn't exist, create new
-                        logger.info(f"Creating new file: {remote_path}")
-                        self.repo.create_file(
-                            path=remote_path,
-                            message=commit_message,
-                            content=content,
-                        )
-                    else:
-                        raise
+                # Git Data API keeps all files in one commit, like the GraphQL path
+                commit_sha = self._commit_files_rest(files, commit_message)
+                if commit_sha is None:
+                    logger.info("All files unchanged, skipping commit")
+                else:
+                    logger.info(f"Commit SHA: {commit_sha[:7]}...")
 
                 # Return relative path
-                relative_path = f"./{remote_path}"
                 logger.info(f"Upload successful. Relative path: {relative_path}")
                 return relative_path
 
@@ -124,10 +241,13 @@ class GitHubUploader:
                 logger.warning(
                     f"Upload attempt {attempt}/{self.max_retries} failed: {e.status} - {e.data}"
                 )
+                wait_time = _retry_wait_time(e, attempt)
+                if wait_time is None:
+                    logger.error("Upload failed with an error that is not worth retrying")
+                    raise
                 if attempt < self.max_retries:
-                    wait_time = 2**attempt  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
+                    logger.info(f"Retrying in {wait_time:.1f} seconds...")
+                    sleep(wait_time)
                 else:
                     logger.error("All upload attempts failed")
                     raise
@@ -136,12 +256,166 @@ class GitHubUploader:
                 logger.error(f"Unexpected error during upload: {e}")
                 raise
 
+    def _commit_files_rest(self, files: dict[str, bytes], message: str) -> str | None:
+        """
+        Commit files to the default branch in one commit through the REST Git Data API.
+
+        Uploads one blob per changed file, builds a tree on top of the branch head,
+        commits it and fast-forwards the branch. Files whose content already matches
+        the branch head are left out; nothing is committed when all of them match.
+        An empty repository has no head to build on, so see _commit_files_empty_repo.
+
+        Args:
+            files: File contents keyed by repository path
+            message: Commit message
+
+        Returns:
+            SHA of the new commit, or None if every file was unchanged
+
+        Raises:
+            GithubException: If any request fails, including a branch that moved
+                while the commit was being built
+        """
+        try:
+            ref = self.repo.get_git_ref(f"heads/{self.repo.default_branch}")
+        except GithubException as e:
+            # 409 "Git Repository is empty"; 404 for a branch that does not exist yet
+            if e.status not in (404, 409):
+                raise
+            return self._commit_files_empty_repo(files, message)
+        head = self.repo.get_git_commit(ref.object.sha)
+        existing = {
+            entry.path: entry.sha
+            for entry in self.repo.get_git_tree(head.tree.sha, recursive=True).tree
+        }
+
+        elements = []
+        for path, content in files.items():
+            if existing.get(path) == git_blob_sha(content):
+                logger.info(f"File unchanged, skipping: {path}")
+                continue
+            blob = self.repo.create_git_blob(base64.b64encode(content).decode("ascii"), "base64")
+            elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob.sha))
+        if not elements:
+            return None
+
+        tree = self.repo.create_git_tree(elements, base_tree=head.tree)
+        commit = self.repo.create_git_commit(message, tree, [head])
+        # Not forced, so GitHub rejects the update if the branch moved meanwhile
+        ref.edit(commit.sha)
+        return commit.sha
+
+    def _commit_files_empty_repo(self, files: dict[str, bytes], message: str) -> str:
+        """
+        Create the first commit of an empty repository.
+
+        The Git Data API rejects every write to an empty repository, so the first
+        file goes through the contents API, which creates the default branch. Any
+        other files then follow in a second commit on top of it.
+
+        Args:
+            files: File contents keyed by repository path
+            message: Commit message
+
+        Returns:
+            SHA of the last commit made
+
+        Raises:
+            GithubException: If any request fails
+        """
+        first_path, *other_paths = files
+        logger.info(f"Repository is empty, creating {first_path} with the first commit")
+        result = self.repo.create_file(
+            path=first_path,
+            message=message,
+            content=files[first_path],
+            branch=self.repo.default_branch,
+        )
+        if not other_paths:
+            return result["commit"].sha
+        return self._commit_files_rest({path: files[path] for path in other_paths}, message)
+
+    def _commit_files_graphql(self, files: dict[str, bytes], message: str) -> str | None:
+        """
+        Commit files to the default branch with the GraphQL createCommitOnBranch mutation.
+
+        Files whose content already matches the branch head are left out of the
+        commit; nothing is committed when all of them match.
+
+        Args:
+            files: File contents keyed by repository path
+            message: Commit message
+
+        Returns:
+            SHA of the new commit, or None if every file was unchanged
+
+        Raises:
+            GithubException: If either GraphQL request fails
+            ValueError: If the repository has no default branch to commit to yet;
+                _commit_files_rest creates the first commit in that case
+        """
+        owner, name = self.repo_name.split("/")
+        requester = self.github.requester
+
+        paths = list(files)
+        query = BRANCH_STATE_QUERY.format(
+            variables="".join(f", $path{i}: String!" for i in range(len(paths))),
+            objects="".join(
+                f"\n    file{i}: object(expression: $path{i}) {{ oid }}" for i in range(len(paths))
+            ),
+        )
+        variables = {"owner": owner, "name": name}
+        variables.update({f"path{i}": f"HEAD:{path}" for i, path in enumerate(paths)})
+
+        _, data = requester.graphql_query(query, variables)
+        repository = data["data"]["repository"]
+        if repository is None or repository["defaultBranchRef"] is None:
+            raise ValueError(f"Repository {self.repo_name} has no default branch")
+
+        # Content-addressed dedup: skip files whose blob SHA is already at HEAD
+        changed = {}
+        for i, path in enumerate(paths):
+            existing = repository.get(f"file{i}")
+            if existing is not None and existing["oid"] == git_blob_sha(files[path]):
+                logger.info(f"File unchanged, skipping: {path}")
+            else:
+                changed[path] = files[path]
+        if not changed:
+            return None
+
+        branch = repository["defaultBranchRef"]
+        commit_input = {
+            "branch": {
+                "repositoryNameWithOwner": self.repo_name,
+                "branchName": branch["name"],
+            },
+            "message": {"headline": message},
+            "fileChanges": {
+                "additions": [
+                    {"path": path, "contents": base64.b64encode(content).decode("ascii")}
+                    for path, content in changed.items()
+                ]
+            },
+            "expectedHeadOid": branch["target"]["oid"],
+        }
+        _, data = requester.graphql_query(COMMIT_FILES_MUTATION, {"input": commit_input})
+        return data["data"]["createCommitOnBranch"]["commit"]["oid"]
+
     def close(self) -> None:
-        """Close GitHub connection."""
-        if self.github:
+        """Close GitHub connection unless it was provided by the caller."""
+        if self.github and self._owns_client:
             self.github.close()
             logger.debug("GitHub connection closed")
 
+    def __enter__(self) -> "GitHubUploader":
+        """Connect on entering a with block."""
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the connection on leaving a with block."""
+        self.close()
+
 
 def upload_to_github(
     token: str,
@@ -163,8 +437,33 @@ def upload_to_github(
     Returns:
         Relative path to uploaded file
     """
-    uploader = GitHubUploader(token, username)
-    try:
+    with GitHubUploader(token, username) as uploader:
         return uploader.upload_screenshot(file_path, remote_path, commit_message)
-    finally:
-        uploader.close()
+
+
+async def upload_to_github_async(
+    token: str,
+    username: str,
+    file_path: Path,
+    remote_path: str,
+    commit_message: str | None = None,
+) -> str:
+    """
+    Asynchronous wrapper for upload_to_github.
+
+    Runs the blocking file read and PyGithub calls in a worker thread so
+    uploads can be awaited alongside other work with asyncio.gather.
+
+    Args:
+        token: GitHub personal access token
+        username: GitHub username
+        file_path: Local path to screenshot file
+        remote_path: Remote path in repository
+        commit_message: Optional commit message
+
+    Returns:
+        Relative path to uploaded file
+    """
+    return await asyncio.to_thread(
+        upload_to_github, token, username, file_path, remote_path, commit_message
+    )
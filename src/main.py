@@ -2,10 +2,9 @@
 
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-from .readme_updater import ReadmeUpdater
 from .config import load_config
-from .github_uploader import GitHubUploader
 from .screenshot_capture import ScreenshotCapture
 from .utils import (
     cleanup_old_screenshots,
@@ -36,78 +35,84 @@ def run_workflow(dry_run: bool = False) -> None:
         # Initialize logging
         logger = setup_logging(config.log_level)
         logger.info("Starting GitHub screenshot automation workflow")
-        logger.info(f"Dry run mode: {dry_run or config.dry_run}")
-
-        # Step 1: Capture screenshot
-        logger.info("=" * 60)
-        logger.info("Step 1: Capturing screenshot")
-        logger.info("=" * 60)
-
-        screenshots_dir = get_project_root() / "screenshots"
-        screenshot_filename = generate_screenshot_filename()
-        screenshot_path = screenshots_dir / screenshot_filename
-
-        capturer = ScreenshotCapture(
-            viewport_width=config.viewport_width,
-            viewport_height=config.viewport_height,
-            quality=config.screenshot_quality,
-        )
-
-        screenshot_path = capturer.capture_sync(config.profile_url, screenshot_path)
-        logger.info(f"Screenshot captured: {screenshot_path}")
-
-        if dry_run or config.dry_run:
-            logger.info("DRY RUN: Skipping upload and README update")
-            logger.info(f"Screenshot saved at: {screenshot_path}")
-            return
-
-        # Step 2: Upload to GitHub profile repository
-        logger.info("=" * 60)
-        logger.info("Step 2: Uploading to GitHub profile repository")
-        logger.info("=" * 60)
-
-        uploader = GitHubUploader(config.github_token, config.github_username)
-        remote_path = f"{config.screenshot_path}/{screenshot_filename}"
+        dry_run = dry_run or config.dry_run
+        logger.info(f"Dry run mode: {dry_run}")
 
+        uploader = None
         try:
-            relative_path = uploader.upload_screenshot(
-                file_path=screenshot_path,
-                remote_path=remote_path,
-                commit_message=f"Add profile screenshot: {screenshot_filename}",
-            )
-            logger.info(f"Screenshot uploaded. Relative path: {relative_path}")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                if not dry_run:
+                    # PyGithub is slow to import, so only load it once we know we will upload
+                    from .github_uploader import GitHubUploader
+
+                    # Authenticate while the browser renders; the two share no data
+                    uploader = GitHubUploader(config.github_token, config.github_username)
+                    connect_future = executor.submit(uploader.connect)
+
+                # Step 1: Capture screenshot
+                logger.info("=" * 60)
+                logger.info("Step 1: Capturing screenshot")
+                logger.info("=" * 60)
+
+                screenshots_dir = get_project_root() / "screenshots"
+                screenshot_filename = generate_screenshot_filename()
+                screenshot_path = screenshots_dir / screenshot_filename
+
+                capturer = ScreenshotCapture(
+                    viewport_width=config.viewport_width,
+                    viewport_height=config.viewport_height,
+                    quality=config.screenshot_quality,
+                )
+
+                screenshot_path = capturer.capture_sync(config.profile_url, screenshot_path)
+                logger.info(f"Screenshot captured: {screenshot_path}")
+
+                if dry_run:
+                    logger.info("DRY RUN: Skipping upload and README update")
+                    logger.info(f"Screenshot saved at: {screenshot_path}")
+                    return
+
+                from .readme_updater import ReadmeUpdater
+
+                # Step 2: Upload screenshot and README to GitHub profile repository
+                logger.info("=" * 60)
+                logger.info("Step 2: Uploading screenshot and README to GitHub profile repository")
+                logger.info("=" * 60)
+
+                remote_path = f"{config.screenshot_path}/{screenshot_filename}"
+
+                # README content only depends on the filename, so it rides in the same commit
+                new_readme = ReadmeUpdater.render_readme(screenshot_filename)
+
+                # Local cleanup does not depend on the upload, so run it while
+                # the API calls are in flight
+                cleanup_future = executor.submit(
+                    cleanup_old_screenshots, screenshots_dir, keep_count=30
+                )
+
+                # Surface any authentication error from the background connect
+                connect_future.result()
+                relative_path = uploader.upload_screenshot(
+                    file_path=screenshot_path,
+                    remote_path=remote_path,
+                    commit_message=f"Update profile screenshot: {screenshot_filename}",
+                    extra_files={"README.md": new_readme.encode("utf-8")},
+                )
+                logger.info(f"Screenshot uploaded. Relative path: {relative_path}")
+                logger.info(f"New README content:\n{new_readme}")
+
+                # Step 3: Cleanup old screenshots
+                logger.info("=" * 60)
+                logger.info("Step 3: Cleaning up old screenshots")
+                logger.info("=" * 60)
+
+                cleanup_future.result()
+                logger.info("Cleanup completed")
         finally:
-            uploader.close()
-
-        # Step 3: Update profile README
-        logger.info("=" * 60)
-        logger.info("Step 3: Updating GitHub profile README")
-        logger.info("=" * 60)
-
-        readme_updater = ReadmeUpdater(config.github_token, config.github_username)
-
-        try:
-            logger.info(f"Updating README with screenshot: {screenshot_filename}")
-            new_readme = readme_updater.update_readme(screenshot_filename)
-            logger.info("README updated successfully!")
-            logger.info(f"New README content:\n{new_readme}")
-        except Exception as e:
-            logger.error("=" * 60)
-            logger.error("CRITICAL ERROR: Failed to update README!")
-            logger.error(f"Error type: {type(e).__name__}")
-            logger.error(f"Error details: {str(e)}")
-            logger.error("=" * 60)
-            raise RuntimeError(f"README update failed: {e}") from e
-        finally:
-            readme_updater.close()
-
-        # Step 4: Cleanup old screenshots
-        logger.info("=" * 60)
-        logger.info("Step 4: Cleaning up old screenshots")
-        logger.info("=" * 60)
-
-        cleanup_old_screenshots(screenshots_dir, keep_count=30)
-        logger.info("Cleanup completed")
+            # Not a with block: entering one would connect up front instead of in the
+            # background. Runs after the executor has waited for the background connect
+            if uploader is not None:
+                uploader.close()
 
         logger.info("=" * 60)
         logger.info("Workflow completed successfully!")
@@ -1,12 +1,38 @@
 """GitHub profile README updater module."""
 
+import asyncio
+import base64
 import logging
-from datetime import datetime
+import time
 
-from github import Auth, Github, GithubException
+from github import Auth, AuthenticatedUser, Github, GithubException, Repository
 
 logger = logging.getLogger("github_screenshot_automation.readme")
 
+# Default branch head and current README.md text in a single request
+README_STATE_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      name
+      target { oid }
+    }
+    object(expression: "HEAD:README.md") {
+      ... on Blob { text }
+    }
+  }
+}
+"""
+
+# Atomic README.md upsert guarded by the expected branch head
+COMMIT_README_MUTATION = """
+mutation($input: CreateCommitOnBranchInput!) {
+  createCommitOnBranch(input: $input) {
+    commit { oid }
+  }
+}
+"""
+
 
 class ReadmeUpdater:
     """Handles updating GitHub profile README with screenshot images."""
@@ -16,18 +42,28 @@ class ReadmeUpdater:
     # Hardcoded profile repository
     PROFILE_REPO = "fUmar3542/fUmar3542"
 
-    def __init__(self, token: str, username: str):
+    def __init__(
+        self,
+        token: str,
+        username: str,
+        github: Github | None = None,
+    ):
         """
         Initialize README updater.
 
         Args:
             token: GitHub personal access token
             username: GitHub username (repository owner)
+            github: Optional existing client to share its connection pool;
+                the caller stays responsible for closing it
         """
         self.token = token
         self.username = username
-        self.github: Github | None = None
+        self.github: Github | None = github
+        self._owns_client = github is None
         self.repo_name = self.PROFILE_REPO
+        self._user: AuthenticatedUser.AuthenticatedUser | None = None
+        self._repo: Repository.Repository | None = None
 
     def connect(self) -> None:
         """
@@ -38,11 +74,15 @@ class ReadmeUpdater:
         """
         try:
             logger.info("Connecting to GitHub API for README update")
-            auth = Auth.Token(self.token)
-            self.github = Github(auth=auth)
+            if self._owns_client:
+                auth = Auth.Token(self.token)
+                self.github = Github(auth=auth)
+                # Cached handles belong to the previous client
+                self._user = None
+                self._repo = None
 
             # Test authentication
-            user = self.github.get_user()
+            user = self._get_user()
             logger.info(f"Authenticated as: {user.login}")
 
             if user.login != self.username:
@@ -71,7 +111,7 @@ class ReadmeUpdater:
             self.connect()
 
         try:
-            repo = self.github.get_repo(self.repo_name)
+            repo = self._get_repo()
             readme = repo.get_readme()
             content = readme.decoded_content.decode('utf-8')
             logger.info(f"Current README length: {len(content)} characters")
@@ -104,24 +144,34 @@ class ReadmeUpdater:
             self.connect()
 
         try:
-            # Generate screenshot markdown image with relative path
-            screenshot_image = self._format_screenshot_link(screenshot_filename)
+            new_readme = self.render_readme(screenshot_filename)
+
+            # UTF-8 payload shared by the GraphQL and REST write paths
+            content = new_readme.encode('utf-8')
 
-            # README will only contain the screenshot image
-            new_readme = screenshot_image
+            # UTC date used in commit messages, computed once for every path below
+            today = time.strftime('%Y-%m-%d', time.gmtime())
 
             # Update README in repository
             logger.info(f"Updating README.md in {self.repo_name} with relative path")
 
+            # Fast path: one GraphQL query + one mutation instead of the REST sequence
+            try:
+                if self._update_readme_graphql(new_readme, content, today):
+                    return new_readme
+                logger.info("No default branch yet, falling back to REST")
+            except GithubException as e:
+                logger.warning(f"GraphQL README update failed, falling back to REST: {e}")
+
             try:
-                repo = self.github.get_repo(self.repo_name)
+                repo = self._get_repo()
                 logger.info(f"Successfully accessed repository: {repo.full_name}")
             except GithubException as e:
                 if e.status == 404:
                     # Repository doesn't exist, create it
                     logger.warning(f"Repository {self.repo_name} not found. Creating it...")
-                    user = self.github.get_user()
-                    repo = user.create_repo(
+                    user = self._get_user()
+                    repo = self._repo = user.create_repo(
                         name=self.username,
                         description=f"GitHub profile for {self.username}",
                         private=False,
@@ -140,11 +190,17 @@ class ReadmeUpdater:
                 # Try to get existing README
                 readme_file = repo.get_readme()
                 logger.info(f"Found existing README.md (SHA: {readme_file.sha[:7]}...)")
-                commit_message = f"Update profile screenshot - {datetime.now().strftime('%Y-%m-%d')}"
+
+                # Skip the write (and the empty commit) when nothing changed
+                if readme_file.decoded_content == content:
+                    logger.info("README.md unchanged, skipping update")
+                    return new_readme
+
+                commit_message = f"Update profile screenshot - {today}"
                 result = repo.update_file(
                     path="README.md",
                     message=commit_message,
-                    content=new_readme,
+                    content=content,
                     sha=readme_file.sha,
                     branch=default_branch
                 )
@@ -154,11 +210,11 @@ class ReadmeUpdater:
                 if e.status == 404:
                     # README doesn't exist, create it
                     logger.info("README.md not found, creating new file...")
-                    commit_message = f"Create README with profile screenshot - {datetime.now().strftime('%Y-%m-%d')}"
+                    commit_message = f"Create README with profile screenshot - {today}"
                     result = repo.create_file(
                         path="README.md",
                         message=commit_message,
-                        content=new_readme,
+                        content=content,
                         branch=default_branch
                     )
                     logger.info(f"README.md created successfully with commit: {commit_message}")
@@ -177,7 +233,101 @@ class ReadmeUpdater:
             logger.error(f"Unexpected error during README update: {type(e).__name__}: {str(e)}")
             raise
 
-    def _format_screenshot_link(self, screenshot_filename: str) -> str:
+    def _update_readme_graphql(self, new_readme: str, content: bytes, today: str) -> bool:
+        """
+        Commit README.md through the GraphQL createCommitOnBranch mutation.
+
+        Args:
+            new_readme: New README content
+            content: new_readme encoded as UTF-8
+            today: Current UTC date (YYYY-MM-DD) for the commit message
+
+        Returns:
+            False if the repository or its default branch does not exist yet, in which
+            case nothing was written and the REST path has to create it; True otherwise
+
+        Raises:
+            GithubException: If either GraphQL request fails
+        """
+        owner, name = self.repo_name.split("/")
+        requester = self.github.requester
+
+        _, data = requester.graphql_query(README_STATE_QUERY, {"owner": owner, "name": name})
+        repository = data["data"]["repository"]
+        if repository is None or repository["defaultBranchRef"] is None:
+            return False
+
+        branch = repository["defaultBranchRef"]
+        current = repository["object"]
+        if current is not None and current.get("text") == new_readme:
+            logger.info("README.md unchanged, skipping update")
+            return True
+
+        if current is None:
+            commit_message = f"Create README with profile screenshot - {today}"
+        else:
+            commit_message = f"Update profile screenshot - {today}"
+
+        commit_input = {
+            "branch": {
+                "repositoryNameWithOwner": self.repo_name,
+                "branchName": branch["name"],
+            },
+            "message": {"headline": commit_message},
+            "fileChanges": {
+                "additions": [
+                    {
+                        "path": "README.md",
+                        "contents": base64.b64encode(content).decode('ascii'),
+                    }
+                ]
+            },
+            "expectedHeadOid": branch["target"]["oid"],
+        }
+        _, data = requester.graphql_query(COMMIT_README_MUTATION, {"input": commit_input})
+        commit_oid = data["data"]["createCommitOnBranch"]["commit"]["oid"]
+        logger.info(f"README.md committed on {branch['name']} with commit: {commit_message}")
+        logger.info(f"Commit SHA: {commit_oid[:7]}...")
+        return True
+
+    def _get_user(self) -> AuthenticatedUser.AuthenticatedUser:
+        """
+        Get the authenticated user, fetching it on first use.
+
+        Returns:
+            Cached AuthenticatedUser instance
+        """
+        if self._user is None:
+            self._user = self.github.get_user()
+        return self._user
+
+    def _get_repo(self) -> Repository.Repository:
+        """
+        Get the profile repository, fetching it on first use.
+
+        Returns:
+            Cached Repository instance
+        """
+        if self._repo is None:
+            self._repo = self.github.get_repo(self.repo_name)
+        return self._repo
+
+    @classmethod
+    def render_readme(cls, screenshot_filename: str) -> str:
+        """
+        Build README content for a screenshot without any API call.
+
+        Args:
+            screenshot_filename: Screenshot filename (e.g., '2026-01-10.png')
+
+        Returns:
+            README text (only the screenshot image)
+        """
+        # Generate screenshot markdown image with relative path
+        return cls._format_screenshot_link(screenshot_filename)
+
+    @classmethod
+    def _format_screenshot_link(cls, screenshot_filename: str) -> str:
         """
         Format screenshot filename as markdown image with relative path.
 
@@ -188,15 +338,23 @@ class ReadmeUpdater:
             Formatted markdown image with relative path
         """
         # Use relative path format: ./screenshots/filename
-        relative_path = f"./screenshots/{screenshot_filename}"
-        return f"![Profile Screenshot]({relative_path})"
+        return f"{cls.SCREENSHOT_MARKER}(./screenshots/{screenshot_filename})"
 
     def close(self) -> None:
-        """Close GitHub connection."""
-        if self.github:
+        """Close GitHub connection unless it was provided by the caller."""
+        if self.github and self._owns_client:
             self.github.close()
             logger.debug("GitHub connection closed")
 
+    def __enter__(self) -> "ReadmeUpdater":
+        """Connect on entering a with block."""
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the connection on leaving a with block."""
+        self.close()
+
 
 def update_github_readme(token: str, username: str, screenshot_filename: str) -> str:
     """
@@ -210,8 +368,23 @@ def update_github_readme(token: str, username: str, screenshot_filename: str) ->
     Returns:
         New README content
     """
-    updater = ReadmeUpdater(token, username)
-    try:
+    with ReadmeUpdater(token, username) as updater:
         return updater.update_readme(screenshot_filename)
-    finally:
-        updater.close()
+
+
+async def update_github_readme_async(token: str, username: str, screenshot_filename: str) -> str:
+    """
+    Asynchronous wrapper for update_github_readme.
+
+    Runs the blocking PyGithub calls in a worker thread so several updates
+    can be awaited together with asyncio.gather.
+
+    Args:
+        token: GitHub personal access token
+        username: GitHub username
+        screenshot_filename: Screenshot filename
+
+    Returns:
+        New README content
+    """
+    return await asyncio.to_thread(update_github_readme, token, username, screenshot_filename)
@@ -1,15 +1,130 @@
 """Screenshot capture module using Playwright for browser automation."""
 
 import asyncio
+import hashlib
 import logging
+import mimetypes
+import os
+import tempfile
+from collections.abc import Awaitable
 from pathlib import Path
+from typing import TypeVar
+from urllib.parse import urlsplit
 
-from playwright.async_api import Browser, async_playwright
+from playwright.async_api import Browser, BrowserContext, Playwright, Route, async_playwright
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-from .utils import ensure_directory_exists
+from .utils import ensure_directory_exists, optimize_png
 
 logger = logging.getLogger("github_screenshot_automation.screenshot")
 
+# README containers hidden so the capture starts at Popular repositories; no restore
+# is needed because the context is closed right after the screenshot
+README_HIDE_CSS = (
+    "article.markdown-body, "
+    'div[data-test-selector="profile-readme-container"], '
+    ".js-profile-readme-container { display: none !important; }"
+)
+
+T = TypeVar("T")
+
+# Browser profile kept between runs so the HTTP cache survives process restarts;
+# captures with a profile are not routed, since routing turns that cache off
+DEFAULT_USER_DATA_DIR = Path.home() / ".cache" / "github-screenshot" / "profile"
+
+# On-disk copies of GitHub's fingerprinted static bundles for routed (profile-less)
+# captures; routing requests disables Chromium's HTTP cache, so these are served from here
+DEFAULT_ASSET_CACHE_DIR = Path.home() / ".cache" / "github-screenshot" / "assets"
+ASSET_CACHE_HOST = "github.githubassets.com"
+ASSET_CACHE_SUFFIXES = (".css", ".js", ".svg")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Requests that never affect the captured profile area
+BLOCKED_URL_PARTS = (
+    "collector.github.com",
+    "api.github.com/_private",
+    "google-analytics",
+    "doubleclick",
+    "octocaptcha",
+)
+BLOCKED_RESOURCE_TYPES = frozenset({"font", "media"})
+
+# Chromium switches that trim background work for a headless one-shot capture.
+# --single-process is left out: it is unstable with the concurrent contexts of capture_many
+BROWSER_ARGS = (
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-features=Translate,BackForwardCache",
+    "--mute-audio",
+    "--hide-scrollbars",
+)
+
+# Output suffixes encoded as JPEG with the configured quality; anything else is PNG
+JPEG_SUFFIXES = frozenset({".jpg", ".jpeg"})
+
+
+async def _block_nonessential(route: Route) -> None:
+    """
+    Abort analytics, captcha, font and media requests; let everything else through.
+
+    Args:
+        route: Intercepted Playwright route
+    """
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        part in request.url for part in BLOCKED_URL_PARTS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _is_cacheable_asset(url: str) -> bool:
+    """
+    Check whether a URL is an immutable GitHub static asset.
+
+    Args:
+        url: Request URL
+
+    Returns:
+        True for CSS/JS/SVG bundles served from the GitHub assets host
+    """
+    parts = urlsplit(url)
+    return parts.hostname == ASSET_CACHE_HOST and parts.path.endswith(ASSET_CACHE_SUFFIXES)
+
+
+def _write_cache_file(cache_path: Path, body: bytes) -> None:
+    """
+    Store an asset in the disk cache.
+
+    Args:
+        cache_path: Cache entry to create or replace
+        body: Asset content
+
+    Raises:
+        OSError: If the entry cannot be written
+    """
+    # Write a uniquely named file then rename it, so concurrent captures in any
+    # process or thread never read a partial entry or rename each other's file
+    with tempfile.NamedTemporaryFile(
+        dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp", delete=False
+    ) as tmp_file:
+        tmp_path = Path(tmp_file.name)
+    try:
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 
 class ScreenshotCapture:
     """Handles GitHub profile screenshot capture using Playwright."""
@@ -19,6 +134,9 @@ class ScreenshotCapture:
         viewport_width: int = 1920,
         viewport_height: int = 1080,
         quality: int = 90,
+        user_data_dir: Path | None = None,
+        asset_cache_dir: Path | None = None,
+        cdp_endpoint: str | None = None,
     ):
         """
         Initialize screenshot capture configuration.
@@ -26,12 +144,147 @@ class ScreenshotCapture:
         Args:
             viewport_width: Browser viewport width in pixels
             viewport_height: Browser viewport height in pixels
-            quality: Screenshot quality (1-100)
+            quality: JPEG quality (1-100), used when output_path ends in .jpg/.jpeg
+            user_data_dir: Persistent browser profile directory whose HTTP cache serves
+                repeat runs; requests are then not routed, so nothing is blocked.
+                None uses a fresh context per capture
+            asset_cache_dir: Directory caching GitHub static assets between runs for
+                captures without user_data_dir; None downloads them on every capture
+            cdp_endpoint: URL of an already running Chromium to connect to over CDP
+                instead of launching one; ignored when user_data_dir is set
         """
         self.viewport_width = viewport_width
         self.viewport_height = viewport_height
         self.quality = quality
+        self.user_data_dir = user_data_dir
+        self.asset_cache_dir = asset_cache_dir
+        self.cdp_endpoint = cdp_endpoint
         self.browser: Browser | None = None
+        self._persistent_context: BrowserContext | None = None
+        self._playwright: Playwright | None = None
+        self._browser_lock: asyncio.Lock | None = None
+
+    async def _ensure_browser(self) -> Browser:
+        """
+        Launch the shared browser on first use.
+
+        Returns:
+            Browser reused by every capture until aclose() is called
+        """
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+
+        async with self._browser_lock:
+            if self.browser is None:
+                self._playwright = await async_playwright().start()
+                if self.cdp_endpoint:
+                    # Share a browser started by another process; close() only disconnects
+                    logger.debug("Connecting to browser at %s", self.cdp_endpoint)
+                    self.browser = await self._playwright.chromium.connect_over_cdp(
+                        self.cdp_endpoint
+                    )
+                else:
+                    logger.debug("Launching browser")
+                    # Launch browser in headless mode
+                    self.browser = await self._playwright.chromium.launch(
+                        headless=True, args=list(BROWSER_ARGS)
+                    )
+        return self.browser
+
+    async def _ensure_persistent_context(self) -> BrowserContext:
+        """
+        Launch the persistent browser context on first use.
+
+        Returns:
+            Context backed by user_data_dir, shared by every capture until aclose()
+        """
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+
+        async with self._browser_lock:
+            if self._persistent_context is None:
+                logger.debug("Launching browser with profile %s", self.user_data_dir)
+                ensure_directory_exists(self.user_data_dir)
+                self._playwright = await async_playwright().start()
+                self._persistent_context = (
+                    await self._playwright.chromium.launch_persistent_context(
+                        str(self.user_data_dir),
+                        headless=True,
+                        args=list(BROWSER_ARGS),
+                        **self._context_options(),
+                    )
+                )
+        return self._persistent_context
+
+    async def _route_request(self, route: Route) -> None:
+        """
+        Serve GitHub static assets from the disk cache, filling it on a miss.
+
+        Args:
+            route: Intercepted Playwright route
+        """
+        url = route.request.url
+        if not _is_cacheable_asset(url):
+            await _block_nonessential(route)
+            return
+
+        cache_path = self.asset_cache_dir / hashlib.sha256(url.encode()).hexdigest()
+        try:
+            # Disk IO runs off the event loop so other routes and pages keep moving
+            body = await asyncio.to_thread(cache_path.read_bytes)
+        except FileNotFoundError:
+            try:
+                response = await route.fetch()
+                body = await response.body()
+            except PlaywrightError as e:
+                # An unresolved route would hang the request; let the browser load it
+                logger.debug("Asset fetch failed for %s, continuing uncached: %s", url, e)
+                await route.continue_()
+                return
+            if response.ok:
+                try:
+                    await asyncio.to_thread(_write_cache_file, cache_path, body)
+                except OSError as e:
+                    # The page still gets the asset; only the next run pays for it again
+                    logger.debug("Could not cache %s: %s", url, e)
+            await route.fulfill(response=response, body=body)
+            return
+
+        content_type = mimetypes.guess_type(urlsplit(url).path)[0] or "application/octet-stream"
+        await route.fulfill(
+            status=200,
+            body=body,
+            headers={
+                "content-type": content_type,
+                # GitHub loads its bundles with crossorigin="anonymous"
+                "access-control-allow-origin": "*",
+            },
+        )
+
+    def _context_options(self) -> dict:
+        """Viewport and user agent shared by ephemeral and persistent contexts."""
+        return {
+            "viewport": {
+                "width": self.viewport_width,
+                "height": self.viewport_height,
+            },
+            "user_agent": USER_AGENT,
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared browser and stop Playwright."""
+        if self._persistent_context is not None:
+            await self._persistent_context.close()
+            self._persistent_context = None
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        # An asyncio.Lock binds to the loop it was first contended on; each sync
+        # wrapper runs a new loop, so the next one needs a fresh lock
+        self._browser_lock = None
 
     async def capture(self, profile_url: str, output_path: Path) -> Path:
         """
@@ -47,170 +300,100 @@ class ScreenshotCapture:
         Raises:
             Exception: If screenshot capture fails
         """
-        logger.info(f"Starting screenshot capture for {profile_url}")
+        logger.info("Starting screenshot capture for %s", profile_url)
 
         try:
-            async with async_playwright() as playwright:
-                # Launch browser in headless mode
-                logger.debug("Launching browser")
-                browser = await playwright.chromium.launch(headless=True)
-
-                # Create browser context
-                context = await browser.new_context(
-                    viewport={
-                        "width": self.viewport_width,
-                        "height": self.viewport_height,
-                    },
-                    user_agent=(
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    ),
-                )
-
+            if self.user_data_dir is None:
+                browser = await self._ensure_browser()
+                # Create a fresh browser context per capture; the browser itself is reused
+                context = await browser.new_context(**self._context_options())
+            else:
+                # Reuse the on-disk profile so cached assets survive between runs
+                context = await self._ensure_persistent_context()
+
+            page = None
+            try:
                 # Create new page
                 page = await context.new_page()
 
+                # Skip third-party and decorative requests; the page is closed after capture.
+                # Any route turns off the HTTP cache, so a persistent profile is left unrouted
+                if self.user_data_dir is None and self.asset_cache_dir is None:
+                    await page.route("**/*", _block_nonessential)
+                elif self.user_data_dir is None:
+                    ensure_directory_exists(self.asset_cache_dir)
+                    await page.route("**/*", self._route_request)
+
                 # Navigate to profile
-                logger.info(f"Navigating to {profile_url}")
-                await page.goto(profile_url, wait_until="networkidle", timeout=30000)
+                logger.info("Navigating to %s", profile_url)
+                await page.goto(profile_url, wait_until="domcontentloaded", timeout=15000)
 
                 # Wait for profile content to load
                 logger.debug("Waiting for profile content")
                 await page.wait_for_selector(".js-profile-editable-replace", timeout=10000)
 
-                # Additional wait for dynamic content
-                await asyncio.sleep(2)
+                # The profile markup is server-rendered, but the avatar and other images
+                # are not loaded until the load event; unlike networkidle it is not held
+                # back by GitHub's background requests
+                try:
+                    await page.wait_for_load_state("load", timeout=5000)
+                except PlaywrightTimeoutError:
+                    logger.debug("Page load event did not fire, some images may be missing")
 
                 # Hide README section to capture from Popular repositories onwards
                 logger.info("Hiding README section before screenshot")
 
                 try:
-                    # Use JavaScript to hide README section with multiple selectors
-                    logger.debug("Executing JavaScript to hide README sections")
-                    await page.evaluate("""
-                        // Hide the README preview section (article tag)
-                        const readmePreview = document.querySelector('article.markdown-body');
-                        if (readmePreview) {
-                            readmePreview.style.display = 'none';
-                            console.log('Hidden: article.markdown-body');
-                        }
-
-                        // Hide the entire readme container with data attribute
-                        const readmeContainer = document.querySelector('div[data-test-selector="profile-readme-container"]');
-                        if (readmeContainer) {
-                            readmeContainer.style.display = 'none';
-                            console.log('Hidden: profile-readme-container');
-                        }
-
-                        // Hide the JS profile readme container
-                        const readmeSection = document.querySelector('.js-profile-readme-container');
-                        if (readmeSection) {
-                            readmeSection.style.display = 'none';
-                            console.log('Hidden: js-profile-readme-container');
-                        }
-
-                        // Hide any h2 that says "README.md" and its parent container
-                        const readmeHeaders = document.querySelectorAll('h2');
-                        readmeHeaders.forEach(header => {
-                            if (header.textContent.includes('README')) {
-                                const container = header.closest('div[class*="readme"]') || header.closest('div.border');
-                                if (container) {
-                                    container.style.display = 'none';
-                                    console.log('Hidden: README header container');
-                                }
-                            }
-                        });
-                    """)
-                    logger.info("README sections hidden via JavaScript")
-
-                    # Wait for layout to adjust after hiding
-                    await page.wait_for_timeout(2000)
-
-                    # Find and scroll to the Popular repositories section
-                    logger.info("Scrolling to Popular repositories section")
-                    popular_repos = page.locator('h2:has-text("Popular repositories")')
-                    if await popular_repos.count() > 0:
-                        await popular_repos.scroll_into_view_if_needed()
-                        logger.info("Scrolled to Popular repositories section")
-                    else:
-                        # Try alternate selectors
-                        popular_repos = page.locator('h2.f4.mb-2.text-normal')
-                        if await popular_repos.count() > 0:
-                            await popular_repos.first.scroll_into_view_if_needed()
-                            logger.info("Scrolled to repositories section")
-                        else:
-                            logger.warning("Could not find Popular repositories heading")
-
-                    # Wait for content to settle after scrolling
-                    await page.wait_for_timeout(1000)
-
+                    # One stylesheet instead of hide/restore evaluate() round-trips
+                    await page.add_style_tag(content=README_HIDE_CSS)
+                    logger.info("README sections hidden via injected CSS")
                 except Exception as e:
-                    logger.warning(f"Error during README hiding: {e}")
+                    logger.warning("Error during README hiding: %s", e)
                     logger.warning("Will capture full page with README visible")
 
                 # Ensure output directory exists
                 ensure_directory_exists(output_path.parent)
 
-                # Capture full page screenshot (will start from visible content after hiding)
-                logger.info(f"Capturing full page screenshot to {output_path}")
-                await page.screenshot(
-                    path=str(output_path),
-                    full_page=True,
-                    type="png",
-                )
-
-                logger.info(f"Screenshot saved successfully to {output_path}")
-
-                # Restore hidden sections using JavaScript
-                try:
-                    logger.debug("Restoring README sections visibility")
-                    await page.evaluate("""
-                        // Restore the README preview section (article tag)
-                        const readmePreview = document.querySelector('article.markdown-body');
-                        if (readmePreview) {
-                            readmePreview.style.display = 'block';
-                            console.log('Restored: article.markdown-body');
-                        }
-
-                        // Restore the entire readme container with data attribute
-                        const readmeContainer = document.querySelector('div[data-test-selector="profile-readme-container"]');
-                        if (readmeContainer) {
-                            readmeContainer.style.display = 'block';
-                            console.log('Restored: profile-readme-container');
-                        }
-
-                        // Restore the JS profile readme container
-                        const readmeSection = document.querySelector('.js-profile-readme-container');
-                        if (readmeSection) {
-                            readmeSection.style.display = 'block';
-                            console.log('Restored: js-profile-readme-container');
-                        }
-
-                        // Restore any h2 README containers
-                        const readmeHeaders = document.querySelectorAll('h2');
-                        readmeHeaders.forEach(header => {
-                            if (header.textContent.includes('README')) {
-                                const container = header.closest('div[class*="readme"]') || header.closest('div.border');
-                                if (container) {
-                                    container.style.display = 'block';
-                                    console.log('Restored: README header container');
-                                }
-                            }
-                        });
-                    """)
-                    logger.info("Hidden sections restored")
-                except Exception as e:
-                    logger.warning(f"Error restoring hidden sections: {e}")
-                    # Not critical since browser will be closed anyway
-
-                # Close browser
-                await browser.close()
+                # Full-page capture ignores scroll position, so no scrolling is needed first
+                logger.info("Capturing full page screenshot to %s", output_path)
+                is_jpeg = output_path.suffix.lower() in JPEG_SUFFIXES
+                if is_jpeg:
+                    await page.screenshot(
+                        path=str(output_path),
+                        full_page=True,
+                        type="jpeg",
+                        quality=self.quality,
+                    )
+                else:
+                    await page.screenshot(
+                        path=str(output_path),
+                        full_page=True,
+                        type="png",
+                    )
+
+                logger.info("Screenshot saved successfully to %s", output_path)
+
+                # Shrink the PNG before upload; compression runs off the event loop
+                if not is_jpeg:
+                    try:
+                        await asyncio.to_thread(optimize_png, output_path)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            size = output_path.stat().st_size
+                            logger.debug("Optimized PNG size: %s bytes", size)
+                    except OSError as e:
+                        logger.warning("Could not optimize screenshot, keeping original: %s", e)
 
                 return output_path
+            finally:
+                # Closing the context releases its pages and the request/response
+                # objects Playwright keeps for them; the shared persistent one stays open
+                if self.user_data_dir is None:
+                    await context.close()
+                elif page is not None:
+                    await page.close()
 
         except Exception as e:
-            logger.error(f"Failed to capture screenshot: {e}")
+            logger.error("Failed to capture screenshot: %s", e)
             raise
 
     def capture_sync(self, profile_url: str, output_path: Path) -> Path:
@@ -224,7 +407,65 @@ class ScreenshotCapture:
         Returns:
             Path to saved screenshot
         """
-        return asyncio.run(self.capture(profile_url, output_path))
+        return asyncio.run(self._run_and_close(self.capture(profile_url, output_path)))
+
+    async def capture_many(
+        self, targets: list[tuple[str, Path]], concurrency: int | None = None
+    ) -> list[Path]:
+        """
+        Capture several profiles concurrently with the shared browser.
+
+        Args:
+            targets: (profile_url, output_path) pairs to capture
+            concurrency: Maximum captures in flight, defaults to the CPU count
+
+        Returns:
+            Paths to saved screenshots, in the order of targets
+
+        Raises:
+            Exception: If any screenshot capture fails
+        """
+        semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+
+        async def bounded_capture(profile_url: str, output_path: Path) -> Path:
+            async with semaphore:
+                return await self.capture(profile_url, output_path)
+
+        return list(
+            await asyncio.gather(
+                *(bounded_capture(profile_url, output_path) for profile_url, output_path in targets)
+            )
+        )
+
+    def capture_many_sync(
+        self, targets: list[tuple[str, Path]], concurrency: int | None = None
+    ) -> list[Path]:
+        """
+        Synchronous wrapper for capture_many method.
+
+        Args:
+            targets: (profile_url, output_path) pairs to capture
+            concurrency: Maximum captures in flight, defaults to the CPU count
+
+        Returns:
+            Paths to saved screenshots, in the order of targets
+        """
+        return asyncio.run(self._run_and_close(self.capture_many(targets, concurrency)))
+
+    async def _run_and_close(self, operation: Awaitable[T]) -> T:
+        """
+        Await an operation and shut the browser down afterwards.
+
+        Args:
+            operation: Capture coroutine to run
+
+        Returns:
+            Result of the operation
+        """
+        try:
+            return await operation
+        finally:
+            await self.aclose()
 
 
 def capture_screenshot(
@@ -233,6 +474,9 @@ def capture_screenshot(
     viewport_width: int = 1920,
     viewport_height: int = 1080,
     quality: int = 90,
+    user_data_dir: Path | None = None,
+    asset_cache_dir: Path | None = None,
+    cdp_endpoint: str | None = None,
 ) -> Path:
     """
     Convenience function to capture a screenshot.
@@ -243,11 +487,16 @@ def capture_screenshot(
         viewport_width: Browser viewport width in pixels
         viewport_height: Browser viewport height in pixels
         quality: Screenshot quality (1-100)
+        user_data_dir: Persistent browser profile directory, or None for a fresh one
+        asset_cache_dir: GitHub static asset cache directory, or None to disable it
+        cdp_endpoint: CDP URL of a running Chromium to reuse, or None to launch one
 
     Returns:
         Path to saved screenshot
     """
-    capturer = ScreenshotCapture(viewport_width, viewport_height, quality)
+    capturer = ScreenshotCapture(
+        viewport_width, viewport_height, quality, user_data_dir, asset_cache_dir, cdp_endpoint
+    )
     return capturer.capture_sync(profile_url, output_path)
 
 
@@ -263,6 +512,24 @@ if __name__ == "__main__":
     parser.add_argument("--width", type=int, default=1920, help="Viewport width")
     parser.add_argument("--height", type=int, default=1080, help="Viewport height")
     parser.add_argument("--quality", type=int, default=90, help="Screenshot quality")
+    parser.add_argument(
+        "--persistent",
+        action="store_true",
+        help=f"Reuse the browser profile and its HTTP cache in {DEFAULT_USER_DATA_DIR}",
+    )
+    parser.add_argument(
+        "--asset-cache",
+        action="store_true",
+        help=(
+            f"Serve GitHub static assets from {DEFAULT_ASSET_CACHE_DIR} across runs "
+            "(ignored with --persistent)"
+        ),
+    )
+    parser.add_argument(
+        "--cdp-endpoint",
+        default=os.environ.get("PW_CDP_ENDPOINT"),
+        help="CDP URL of a running Chromium to share (defaults to $PW_CDP_ENDPOINT)",
+    )
     parser.add_argument("--log-level", default="INFO", help="Logging level")
 
     args = parser.parse_args()
@@ -276,6 +543,9 @@ if __name__ == "__main__":
             args.width,
             args.height,
             args.quality,
+            DEFAULT_USER_DATA_DIR if args.persistent else None,
+            DEFAULT_ASSET_CACHE_DIR if args.asset_cache else None,
+            args.cdp_endpoint,
         )
         print(f"Screenshot saved to: {output}")
     except Exception as e:
@@ -1,9 +1,28 @@
 """Utility functions for the GitHub screenshot automation system."""
 
+import fnmatch
+import functools
+import heapq
+import io
 import logging
+import os
 import sys
-from datetime import datetime
 from pathlib import Path
+from time import localtime, strftime
+
+from PIL import Image
+
+# Shared by every handler setup_logging installs
+LOG_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+# Directories ensure_directory_exists has already created or found in this process
+_known_directories: set[Path] = set()
+
+# Screenshot filenames: old format (screenshot-*.png) and new format (YYYY-MM-DD.png/.jpg)
+SCREENSHOT_PATTERNS = ("screenshot-*.png", "????-??-??.png", "????-??-??.jpg")
 
 
 def setup_logging(level: str = "INFO") -> logging.Logger:
@@ -26,12 +45,7 @@ def setup_logging(level: str = "INFO") -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(getattr(logging, level))
 
-    # Formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(LOG_FORMATTER)
 
     logger.addHandler(console_handler)
 
@@ -45,41 +59,68 @@ def generate_timestamp() -> str:
     Returns:
         Timestamp in format YYYY-MM-DD-HH-MM-SS
     """
-    return datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    return strftime("%Y-%m-%d-%H-%M-%S", localtime())
 
 
-def generate_screenshot_filename(timestamp: str | None = None) -> str:
+def generate_screenshot_filename(timestamp: str | None = None, extension: str = "png") -> str:
     """
     Generate screenshot filename with date only (for shorter URLs).
 
     Args:
         timestamp: Optional custom timestamp, uses current time if None
+        extension: File extension without the dot; "jpg" produces a JPEG capture
 
     Returns:
-        Filename in format YYYY-MM-DD.png (date only, shorter for bio URLs)
+        Filename in format YYYY-MM-DD.<extension> (date only, shorter for bio URLs)
     """
     if timestamp is None:
         # Use date only for shorter filenames
-        date_str = datetime.now().strftime("%Y-%m-%d")
+        date_str = strftime("%Y-%m-%d", localtime())
     else:
         # Extract date from full timestamp if provided
         if len(timestamp) >= 10:
             date_str = timestamp[:10]  # Extract YYYY-MM-DD
         else:
             date_str = timestamp
-    return f"{date_str}.png"
+    return f"{date_str}.{extension}"
 
 
 def ensure_directory_exists(path: Path) -> None:
     """
     Create directory if it doesn't exist.
 
+    Directories created earlier in the process are remembered, so repeated calls for
+    the same path skip the mkdir syscall.
+
     Args:
         path: Directory path to create
     """
+    if path in _known_directories:
+        return
     path.mkdir(parents=True, exist_ok=True)
+    _known_directories.add(path)
 
 
+def optimize_png(path: Path) -> None:
+    """
+    Losslessly recompress a PNG in place, keeping the original if it is already smaller.
+
+    Args:
+        path: Path to PNG file
+
+    Raises:
+        OSError: If the file cannot be read or is not a valid image
+    """
+    original_size = path.stat().st_size
+    buffer = io.BytesIO()
+    with Image.open(path) as image:
+        image.save(buffer, format="PNG", optimize=True)
+
+    if buffer.tell() < original_size:
+        path.write_bytes(buffer.getvalue())
+
+
+@functools.cache
 def get_project_root() -> Path:
     """
     Get the project root directory.
@@ -101,26 +142,17 @@ def cleanup_old_screenshots(directory: Path, keep_count: int = 30) -> None:
     if not directory.exists():
         return
 
-    # Find both old format (screenshot-*.png) and new format (YYYY-MM-DD.png)
-    screenshots = []
-    screenshots.extend(directory.glob("screenshot-*.png"))  # Old format
-    screenshots.extend(directory.glob("????-??-??.png"))  # New format (date pattern)
-
-    # Sort by modification time (most recent first)
-    screenshots = sorted(
-        screenshots,
-        key=lambda x: x.stat().st_mtime,
-        reverse=True,
-    )
-
-    # Remove duplicates (in case a file matches both patterns)
-    seen = set()
-    unique_screenshots = []
-    for screenshot in screenshots:
-        if screenshot not in seen:
-            seen.add(screenshot)
-            unique_screenshots.append(screenshot)
-
-    # Delete old screenshots beyond keep_count
-    for screenshot in unique_screenshots[keep_count:]:
-        screenshot.unlink()
+    # One directory pass; DirEntry caches stat info, and each file is seen once
+    with os.scandir(directory) as entries:
+        screenshots = [
+            entry
+            for entry in entries
+            if any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in SCREENSHOT_PATTERNS)
+        ]
+
+    # Delete the oldest screenshots beyond keep_count
+    excess = len(screenshots) - keep_count
+    if excess <= 0:
+        return
+    for entry in heapq.nsmallest(excess, screenshots, key=lambda e: e.stat().st_mtime):
+        os.unlink(entry.path)
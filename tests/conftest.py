@@ -0,0 +1,85 @@
+"""Shared pytest fixtures."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Call-phase budget for a single test; everything here is mocked, so anything slower
+# usually means a real browser or network call slipped in
+SLOW_TEST_SECONDS = 0.3
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_dotenv():
+    """Keep Config.from_env from reading a developer's .env file."""
+    with patch("src.config.load_dotenv", return_value=None) as load_dotenv:
+        yield load_dotenv
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _github_classes():
+    """Patch the PyGithub client class once for the whole session."""
+    with (
+        patch("src.readme_updater.Github") as readme_github,
+        patch("src.github_uploader.Github") as uploader_github,
+    ):
+        yield readme_github, uploader_github
+
+
+@pytest.fixture
+def readme_github(_github_classes):
+    """Patched Github class used by the README updater, reset after each test."""
+    mock_github = _github_classes[0]
+    yield mock_github
+    mock_github.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def uploader_github(_github_classes):
+    """Patched Github class used by the uploader, reset after each test."""
+    mock_github = _github_classes[1]
+    yield mock_github
+    mock_github.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def github_mock(readme_github, uploader_github):
+    """Github client instance returned by both patched classes, logged in as testuser."""
+    mock_github = Mock()
+    mock_github.get_user.return_value.login = "testuser"
+    readme_github.return_value = mock_github
+    uploader_github.return_value = mock_github
+    return mock_github
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_sleep():
+    """Skip the uploader's retry backoff sleeps for the whole session."""
+    # Patch the uploader's own name, not time.sleep, which every other module shares
+    with patch("src.github_uploader.sleep") as sleep:
+        yield sleep
+
+
+@pytest.fixture
+def mock_sleep(_no_sleep):
+    """Patched uploader sleep with the calls from earlier tests cleared."""
+    _no_sleep.reset_mock()
+    return _no_sleep
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Fail tests that exceed SLOW_TEST_SECONDS unless they are marked slow."""
+    outcome = yield
+    report = outcome.get_result()
+    if (
+        report.when == "call"
+        and report.passed
+        and call.duration > SLOW_TEST_SECONDS
+        and item.get_closest_marker("slow") is None
+    ):
+        report.outcome = "failed"
+        report.longrepr = (
+            f"{item.nodeid} took {call.duration:.2f}s, over the {SLOW_TEST_SECONDS}s budget; "
+            "mock the slow dependency or mark the test with @pytest.mark.slow"
+        )
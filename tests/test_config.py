@@ -1,25 +1,25 @@
 """Unit tests for configuration module."""
 
-import os
+import dataclasses
 from unittest.mock import patch
 
 import pytest
 
-from src.config import Config
+from src.config import Config, _load_config_cached, load_config
+
+
+@pytest.fixture
+def base_env(monkeypatch):
+    """Set the required environment variables for Config.from_env."""
+    monkeypatch.setenv("GITHUB_TOKEN", "test_token")
+    monkeypatch.setenv("GITHUB_USERNAME", "testuser")
+    monkeypatch.setenv("PROFILE_URL", "https://github.com/testuser")
 
 
 class TestConfig:
     """Test cases for Config class."""
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-        },
-    )
-    def test_from_env_with_required_vars(self):
+    def test_from_env_with_required_vars(self, base_env):
         """Test loading configuration with all required variables."""
         config = Config.from_env()
         assert config.github_token == "test_token"
@@ -27,44 +27,31 @@ class TestConfig:
         assert config.profile_repo == "fUmar3542/fUmar3542"
         assert config.profile_url == "https://github.com/testuser"
 
-    @patch("src.config.load_dotenv")
-    @patch.dict(os.environ, {}, clear=True)
-    def test_from_env_missing_required_vars(self, mock_load_dotenv):
+    def test_from_env_missing_required_vars(self, monkeypatch):
         """Test that missing required variables raise ValueError."""
-        mock_load_dotenv.return_value = None
+        for var in ("GITHUB_TOKEN", "GITHUB_USERNAME", "PROFILE_URL"):
+            monkeypatch.delenv(var, raising=False)
         with pytest.raises(ValueError) as excinfo:
             Config.from_env()
         assert "Missing required environment variables" in str(excinfo.value)
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://example.com/testuser",
-        },
-    )
-    def test_from_env_invalid_profile_url(self):
+    def test_from_env_invalid_profile_url(self, base_env, monkeypatch):
         """Test that invalid profile URL raises ValueError."""
+        monkeypatch.setenv("PROFILE_URL", "https://example.com/testuser")
         with pytest.raises(ValueError) as excinfo:
             Config.from_env()
         assert "must start with 'https://github.com/'" in str(excinfo.value)
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "VIEWPORT_WIDTH": "2560",
-            "VIEWPORT_HEIGHT": "1440",
-            "SCREENSHOT_QUALITY": "95",
-            "DRY_RUN": "true",
-            "LOG_LEVEL": "DEBUG",
-        },
-    )
-    def test_from_env_with_optional_vars(self):
+    def test_from_env_with_optional_vars(self, base_env, monkeypatch):
         """Test loading configuration with optional variables."""
+        for name, value in [
+            ("VIEWPORT_WIDTH", "2560"),
+            ("VIEWPORT_HEIGHT", "1440"),
+            ("SCREENSHOT_QUALITY", "95"),
+            ("DRY_RUN", "true"),
+            ("LOG_LEVEL", "DEBUG"),
+        ]:
+            monkeypatch.setenv(name, value)
         config = Config.from_env()
         assert config.viewport_width == 2560
         assert config.viewport_height == 1440
@@ -81,50 +68,53 @@ class TestConfig:
         )
         config.validate()  # Should not raise
 
-    def test_validate_invalid_viewport_width(self):
-        """Test validation with invalid viewport width."""
+    def test_config_is_immutable(self):
+        """Test that configuration cannot be mutated after construction."""
         config = Config(
             github_token="test",
             github_username="test",
-                        profile_url="https://github.com/test",
-            viewport_width=500,
+            profile_url="https://github.com/test",
         )
-        with pytest.raises(ValueError) as excinfo:
-            config.validate()
-        assert "Invalid viewport width" in str(excinfo.value)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.dry_run = True
 
-    def test_validate_invalid_viewport_height(self):
-        """Test validation with invalid viewport height."""
+    @pytest.mark.parametrize(
+        ("overrides", "message"),
+        [
+            ({"viewport_width": 500}, "Invalid viewport width"),
+            ({"viewport_height": 400}, "Invalid viewport height"),
+            ({"screenshot_quality": 150}, "Invalid screenshot quality"),
+            ({"log_level": "INVALID"}, "Invalid log level"),
+        ],
+    )
+    def test_validate_invalid(self, overrides, message):
+        """Test validation rejects out-of-range settings."""
         config = Config(
             github_token="test",
             github_username="test",
-                        profile_url="https://github.com/test",
-            viewport_height=400,
+            profile_url="https://github.com/test",
+            **overrides,
         )
         with pytest.raises(ValueError) as excinfo:
             config.validate()
-        assert "Invalid viewport height" in str(excinfo.value)
+        assert message in str(excinfo.value)
 
-    def test_validate_invalid_quality(self):
-        """Test validation with invalid screenshot quality."""
-        config = Config(
-            github_token="test",
-            github_username="test",
-                        profile_url="https://github.com/test",
-            screenshot_quality=150,
-        )
-        with pytest.raises(ValueError) as excinfo:
-            config.validate()
-        assert "Invalid screenshot quality" in str(excinfo.value)
+    def test_load_config_cached(self, base_env):
+        """Test that repeated loads with unchanged environment reuse the config."""
+        _load_config_cached.cache_clear()
+        with patch("src.config.Config.from_env", wraps=Config.from_env) as mock_from_env:
+            first = load_config()
+            second = load_config()
 
-    def test_validate_invalid_log_level(self):
-        """Test validation with invalid log level."""
-        config = Config(
-            github_token="test",
-            github_username="test",
-                        profile_url="https://github.com/test",
-            log_level="INVALID",
-        )
-        with pytest.raises(ValueError) as excinfo:
-            config.validate()
-        assert "Invalid log level" in str(excinfo.value)
+        assert first is second
+        mock_from_env.assert_called_once()
+
+    def test_load_config_cache_invalidated_by_env_change(self, base_env, monkeypatch):
+        """Test that changing an environment variable reloads the config."""
+        first = load_config()
+
+        monkeypatch.setenv("VIEWPORT_WIDTH", "2560")
+        second = load_config()
+
+        assert first is not second
+        assert second.viewport_width == 2560
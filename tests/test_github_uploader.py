@@ -1,12 +1,60 @@
 """Unit tests for GitHub uploader module."""
 
+import email.utils
+import time
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
 import pytest
-from github import GithubException
+from github import Auth, GithubException
 
-from src.github_uploader import GitHubUploader, upload_to_github
+from src.github_uploader import (
+    MAX_BACKOFF,
+    GitHubUploader,
+    _retry_wait_time,
+    git_blob_sha,
+    upload_to_github,
+    upload_to_github_async,
+)
+
+# Shared error instances; mocks raise them without rebuilding the message per call
+SERVER_ERROR = GithubException(500, "Server Error")
+BAD_GATEWAY = GithubException(502, "Bad Gateway")
+
+
+@pytest.fixture(scope="session")
+def screenshot_file(tmp_path_factory):
+    """Screenshot written once and shared by every upload test."""
+    path = tmp_path_factory.mktemp("data") / "test_screenshot.png"
+    path.write_bytes(b"test image data")
+    return path
+
+
+@pytest.fixture
+def graphql_down(github_mock):
+    """Client whose GraphQL endpoint fails, so uploads take the REST fallback."""
+    github_mock.requester.graphql_query.side_effect = BAD_GATEWAY
+    return github_mock
+
+
+@pytest.fixture
+def rest_repo(graphql_down):
+    """Profile repository for the REST fallback, with nothing at the branch head yet."""
+    mock_repo = Mock()
+    mock_repo.default_branch = "main"
+    mock_repo.get_git_ref.return_value.object = SimpleNamespace(sha="head123")
+    mock_repo.get_git_tree.return_value = SimpleNamespace(tree=[])
+    mock_repo.create_git_blob.return_value = SimpleNamespace(sha="blob123")
+    mock_repo.create_git_commit.return_value = SimpleNamespace(sha="commit123")
+    graphql_down.get_repo.return_value = mock_repo
+    return mock_repo
+
+
+def _committed_paths(mock_repo):
+    """Paths in the single tree the REST fallback built for its commit."""
+    mock_repo.create_git_tree.assert_called_once()
+    return [element._identity["path"] for element in mock_repo.create_git_tree.call_args.args[0]]
 
 
 class TestGitHubUploader:
@@ -20,166 +68,378 @@ class TestGitHubUploader:
         assert uploader.repo_name == "fUmar3542/fUmar3542"
         assert uploader.max_retries == 3
 
-    @patch("src.github_uploader.Github")
-    def test_connect_success(self, mock_github):
+    def test_connect_success(self, github_mock, uploader_github):
         """Test successful GitHub connection."""
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
-        mock_repo = MagicMock()
+        mock_repo = Mock()
         mock_repo.full_name = "fUmar3542/fUmar3542"
 
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
+        github_mock.get_repo.return_value = mock_repo
 
         uploader = GitHubUploader("test_token", "testuser")
         uploader.connect()
 
         assert uploader.github is not None
         assert uploader.repo is not None
-        mock_github.assert_called_once_with("test_token")
+        uploader_github.assert_called_once()
+        auth = uploader_github.call_args.kwargs["auth"]
+        assert isinstance(auth, Auth.Token)
+        assert auth.token == "test_token"
 
-    @patch("src.github_uploader.Github")
-    def test_connect_authentication_failure(self, mock_github):
+    def test_connect_authentication_failure(self, github_mock):
         """Test connection with authentication failure."""
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.side_effect = GithubException(401, "Unauthorized")
-        mock_github.return_value = mock_github_instance
+        github_mock.get_repo.side_effect = GithubException(401, "Unauthorized")
 
         uploader = GitHubUploader("invalid_token", "testuser")
 
         with pytest.raises(GithubException):
             uploader.connect()
 
-    @patch("src.github_uploader.Github")
-    def test_upload_screenshot_new_file(self, mock_github, tmp_path):
-        """Test uploading a new screenshot."""
-        # Create test file
-        test_file = tmp_path / "test_screenshot.png"
-        test_file.write_bytes(b"test image data")
+    def test_shared_client_not_recreated_or_closed(self, uploader_github):
+        """Test that an injected client is reused and left open on close."""
+        shared_github = Mock()
+
+        uploader = GitHubUploader("test_token", "testuser", github=shared_github)
+        uploader.connect()
+        uploader.close()
 
-        # Setup mocks
-        mock_repo = MagicMock()
-        mock_repo.default_branch = "main"
-        mock_repo.get_contents.side_effect = GithubException(404, "Not Found")
-        mock_repo.create_file.return_value = {"commit": {"sha": "abc123"}}
+        assert uploader.github is shared_github
+        shared_github.get_repo.assert_called_once_with("fUmar3542/fUmar3542")
+        uploader_github.assert_not_called()
+        shared_github.close.assert_not_called()
 
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
+    def test_context_manager_connects_and_closes(self, github_mock):
+        """Test that a with block connects on entry and closes on exit."""
+        with GitHubUploader("test_token", "testuser") as uploader:
+            assert uploader.repo is github_mock.get_repo.return_value
 
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
+        github_mock.close.assert_called_once()
 
+    def test_upload_screenshot_new_file(self, rest_repo, screenshot_file):
+        """Test uploading a new screenshot."""
         uploader = GitHubUploader("test_token", "testuser")
         uploader.connect()
 
         # Upload
-        relative_path = uploader.upload_screenshot(test_file, "screenshots/test.png", "Test commit")
+        relative_path = uploader.upload_screenshot(
+            screenshot_file, "screenshots/test.png", "Test commit"
+        )
 
         # Assertions
         assert relative_path == "./screenshots/test.png"
-        mock_repo.create_file.assert_called_once()
+        rest_repo.get_git_ref.assert_called_once_with("heads/main")
+        rest_repo.create_git_blob.assert_called_once_with("dGVzdCBpbWFnZSBkYXRh", "base64")
+        assert _committed_paths(rest_repo) == ["screenshots/test.png"]
+        rest_repo.get_git_ref.return_value.edit.assert_called_once_with("commit123")
 
-    @patch("src.github_uploader.Github")
-    def test_upload_screenshot_update_existing(self, mock_github, tmp_path):
+    def test_upload_screenshot_update_existing(self, rest_repo, screenshot_file):
         """Test updating an existing screenshot."""
-        # Create test file
-        test_file = tmp_path / "test_screenshot.png"
-        test_file.write_bytes(b"test image data")
+        rest_repo.get_git_tree.return_value = SimpleNamespace(
+            tree=[SimpleNamespace(path="screenshots/test.png", sha="old_sha")]
+        )
 
-        # Setup mocks
-        mock_existing = MagicMock()
-        mock_existing.sha = "old_sha"
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
 
-        mock_repo = MagicMock()
-        mock_repo.default_branch = "main"
-        mock_repo.get_contents.return_value = mock_existing
-        mock_repo.update_file.return_value = {"commit": {"sha": "new_sha"}}
+        # Upload
+        relative_path = uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
 
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
+        # Assertions
+        assert relative_path == "./screenshots/test.png"
+        assert _committed_paths(rest_repo) == ["screenshots/test.png"]
+        rest_repo.create_git_commit.assert_called_once()
 
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
+    def test_upload_screenshot_rest_unchanged_skips_commit(self, rest_repo, screenshot_file):
+        """Test that the REST fallback does not commit a byte-identical screenshot."""
+        rest_repo.get_git_tree.return_value = SimpleNamespace(
+            tree=[
+                SimpleNamespace(path="screenshots/test.png", sha=git_blob_sha(b"test image data"))
+            ]
+        )
 
         uploader = GitHubUploader("test_token", "testuser")
         uploader.connect()
+        uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
+
+        rest_repo.create_git_blob.assert_not_called()
+        rest_repo.create_git_commit.assert_not_called()
+
+    def test_upload_screenshot_graphql(self, github_mock, screenshot_file):
+        """Test uploading through a single GraphQL commit without a contents probe."""
+        mock_repo = Mock()
+
+        github_mock.get_repo.return_value = mock_repo
+        github_mock.requester.graphql_query.side_effect = [
+            (
+                {},
+                {
+                    "data": {
+                        "repository": {
+                            "defaultBranchRef": {"name": "main", "target": {"oid": "head123"}}
+                        }
+                    }
+                },
+            ),
+            ({}, {"data": {"createCommitOnBranch": {"commit": {"oid": "commit123"}}}}),
+        ]
 
-        # Upload
-        relative_path = uploader.upload_screenshot(test_file, "screenshots/test.png")
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+
+        relative_path = uploader.upload_screenshot(
+            screenshot_file, "screenshots/test.png", "Test commit"
+        )
 
-        # Assertions
         assert relative_path == "./screenshots/test.png"
-        mock_repo.update_file.assert_called_once()
+        mutation_input = github_mock.requester.graphql_query.call_args[0][1]["input"]
+        assert mutation_input["expectedHeadOid"] == "head123"
+        assert mutation_input["fileChanges"]["additions"] == [
+            {"path": "screenshots/test.png", "contents": "dGVzdCBpbWFnZSBkYXRh"}
+        ]
+        mock_repo.create_git_tree.assert_not_called()
+
+    def test_upload_screenshot_graphql_extra_files(self, github_mock, screenshot_file):
+        """Test that extra files ride in the same GraphQL commit as the screenshot."""
+        github_mock.requester.graphql_query.side_effect = [
+            (
+                {},
+                {
+                    "data": {
+                        "repository": {
+                            "defaultBranchRef": {"name": "main", "target": {"oid": "head123"}},
+                            "file1": {"oid": git_blob_sha(b"old readme")},
+                        }
+                    }
+                },
+            ),
+            ({}, {"data": {"createCommitOnBranch": {"commit": {"oid": "commit123"}}}}),
+        ]
 
-    @patch("src.github_uploader.Github")
-    def test_upload_screenshot_file_not_found(self, mock_github):
-        """Test upload with non-existent file."""
-        mock_github_instance = MagicMock()
-        mock_github.return_value = mock_github_instance
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+        uploader.upload_screenshot(
+            screenshot_file, "screenshots/test.png", extra_files={"README.md": b"readme"}
+        )
+
+        assert github_mock.requester.graphql_query.call_count == 2
+        mutation_input = github_mock.requester.graphql_query.call_args[0][1]["input"]
+        assert mutation_input["expectedHeadOid"] == "head123"
+        assert mutation_input["fileChanges"]["additions"] == [
+            {"path": "screenshots/test.png", "contents": "dGVzdCBpbWFnZSBkYXRh"},
+            {"path": "README.md", "contents": "cmVhZG1l"},
+        ]
+
+    def test_upload_screenshot_graphql_variables(self, github_mock, screenshot_file):
+        """Test that GraphQL variables are passed flat, as PyGithub 2.4+ sends them."""
+        github_mock.requester.graphql_query.side_effect = [
+            (
+                {},
+                {
+                    "data": {
+                        "repository": {
+                            "defaultBranchRef": {"name": "main", "target": {"oid": "head123"}}
+                        }
+                    }
+                },
+            ),
+            ({}, {"data": {"createCommitOnBranch": {"commit": {"oid": "commit123"}}}}),
+        ]
+
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+        uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
+
+        state_call, commit_call = github_mock.requester.graphql_query.call_args_list
+        assert state_call.args[1] == {
+            "owner": "fUmar3542",
+            "name": "fUmar3542",
+            "path0": "HEAD:screenshots/test.png",
+        }
+        assert list(commit_call.args[1]) == ["input"]
+        assert commit_call.args[1]["input"]["branch"]["branchName"] == "main"
+
+    def test_upload_screenshot_unchanged_skips_commit(self, github_mock, screenshot_file):
+        """Test that a byte-identical screenshot is not committed again."""
+        github_mock.requester.graphql_query.return_value = (
+            {},
+            {
+                "data": {
+                    "repository": {
+                        "defaultBranchRef": {"name": "main", "target": {"oid": "head123"}},
+                        "file0": {"oid": git_blob_sha(b"test image data")},
+                    }
+                }
+            },
+        )
 
         uploader = GitHubUploader("test_token", "testuser")
-        uploader.repo = MagicMock()
+        uploader.connect()
+
+        relative_path = uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
+
+        assert relative_path == "./screenshots/test.png"
+        github_mock.requester.graphql_query.assert_called_once()
+
+    def test_git_blob_sha(self):
+        """Test local blob SHA matches Git's object hashing."""
+        assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    def test_upload_screenshot_extra_files_rest_fallback(self, rest_repo, screenshot_file):
+        """Test that extra files share the screenshot's commit when GraphQL is unavailable."""
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+        uploader.upload_screenshot(
+            screenshot_file, "screenshots/test.png", extra_files={"README.md": b"readme"}
+        )
+
+        assert _committed_paths(rest_repo) == ["screenshots/test.png", "README.md"]
+        rest_repo.create_git_commit.assert_called_once()
+        rest_repo.get_git_ref.return_value.edit.assert_called_once_with("commit123")
+
+    def test_upload_screenshot_empty_repo(self, github_mock, rest_repo, screenshot_file):
+        """Test that an empty repository gets its first commit through the contents API."""
+        github_mock.requester.graphql_query.side_effect = None
+        github_mock.requester.graphql_query.return_value = (
+            {},
+            {"data": {"repository": {"defaultBranchRef": None}}},
+        )
+        ref = rest_repo.get_git_ref.return_value
+        rest_repo.get_git_ref.side_effect = [GithubException(409, "Git Repository is empty"), ref]
+
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+        relative_path = uploader.upload_screenshot(
+            screenshot_file, "screenshots/test.png", extra_files={"README.md": b"readme"}
+        )
+
+        assert relative_path == "./screenshots/test.png"
+        rest_repo.create_file.assert_called_once()
+        assert rest_repo.create_file.call_args.kwargs["path"] == "screenshots/test.png"
+        assert rest_repo.create_file.call_args.kwargs["branch"] == "main"
+        assert _committed_paths(rest_repo) == ["README.md"]
+        ref.edit.assert_called_once_with("commit123")
+
+    def test_upload_screenshot_file_not_found(self):
+        """Test upload with non-existent file."""
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.repo = Mock()
 
         with pytest.raises(FileNotFoundError):
             uploader.upload_screenshot(Path("/non/existent/file.png"), "test.png")
 
-    @patch("src.github_uploader.Github")
-    @patch("src.github_uploader.time.sleep")
-    def test_upload_screenshot_retry_on_failure(self, mock_sleep, mock_github, tmp_path):
+    def test_upload_screenshot_retry_on_failure(self, mock_sleep, rest_repo, screenshot_file):
         """Test retry logic on upload failure."""
-        # Create test file
-        test_file = tmp_path / "test_screenshot.png"
-        test_file.write_bytes(b"test image data")
-
         # Setup mocks to fail twice then succeed
-        mock_repo = MagicMock()
-        mock_repo.default_branch = "main"
-        mock_repo.get_contents.side_effect = [
-            GithubException(404, "Not Found"),
-            GithubException(404, "Not Found"),
-            GithubException(404, "Not Found"),
-        ]
-        mock_repo.create_file.side_effect = [
-            GithubException(500, "Server Error"),
-            GithubException(500, "Server Error"),
-            {"commit": {"sha": "abc123"}},
+        rest_repo.create_git_commit.side_effect = [
+            SERVER_ERROR,
+            SERVER_ERROR,
+            SimpleNamespace(sha="commit123"),
         ]
 
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
-
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
-
         uploader = GitHubUploader("test_token", "testuser", max_retries=3)
         uploader.connect()
 
         # Upload should succeed after retries
-        relative_path = uploader.upload_screenshot(test_file, "screenshots/test.png")
+        relative_path = uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
 
         assert relative_path == "./screenshots/test.png"
         assert mock_sleep.call_count == 2  # Called between retries
 
+    def test_upload_screenshot_retry_after_honored(self, mock_sleep, rest_repo, screenshot_file):
+        """Test that a Retry-After header sets the wait before the next attempt."""
+        rest_repo.create_git_commit.side_effect = [
+            GithubException(429, "Too Many Requests", headers={"retry-after": "7"}),
+            SimpleNamespace(sha="commit123"),
+        ]
+
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+        uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
+
+        mock_sleep.assert_called_once_with(7.0)
+
+    def test_upload_screenshot_client_error_not_retried(
+        self, mock_sleep, rest_repo, screenshot_file
+    ):
+        """Test that a non-retryable 4xx error fails without sleeping."""
+        # Branch moved while the commit was built, the fast-forward is rejected
+        ref = rest_repo.get_git_ref.return_value
+        ref.edit.side_effect = GithubException(422, "Update is not a fast forward")
+
+        uploader = GitHubUploader("test_token", "testuser")
+        uploader.connect()
+
+        with pytest.raises(GithubException):
+            uploader.upload_screenshot(screenshot_file, "screenshots/test.png")
+
+        ref.edit.assert_called_once()
+        mock_sleep.assert_not_called()
+
     @patch("src.github_uploader.GitHubUploader")
-    def test_upload_to_github_function(self, mock_uploader_class, tmp_path):
+    def test_upload_to_github_function(self, mock_uploader_class, screenshot_file):
         """Test convenience function for upload."""
-        test_file = tmp_path / "test.png"
-        test_file.write_bytes(b"test")
-
-        mock_instance = MagicMock()
+        mock_instance = mock_uploader_class.return_value.__enter__.return_value
         mock_instance.upload_screenshot.return_value = "./screenshots/test.png"
-        mock_uploader_class.return_value = mock_instance
 
-        result = upload_to_github("token", "testuser", test_file, "screenshots/test.png")
+        result = upload_to_github("token", "testuser", screenshot_file, "screenshots/test.png")
 
         assert result == "./screenshots/test.png"
         mock_instance.upload_screenshot.assert_called_once()
-        mock_instance.close.assert_called_once()
+        mock_uploader_class.return_value.__exit__.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("status", "headers"),
+    [
+        (403, {"x-ratelimit-remaining": "42"}),
+        (422, {}),
+        (403, {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "{far}"}),
+        (429, {"retry-after": str(MAX_BACKOFF + 1)}),
+    ],
+)
+def test_retry_wait_time_gives_up(status, headers):
+    """Test that plain 403s, client errors and waits beyond MAX_BACKOFF are not retried."""
+    headers = {k: v.format(far=int(time.time()) + 3600) for k, v in headers.items()}
+    error = GithubException(status, "error", headers=headers)
+
+    assert _retry_wait_time(error, attempt=1) is None
+
+
+def test_retry_wait_time_rate_limit_reset():
+    """Test that an exhausted quota waits until the reset time."""
+    headers = {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(int(time.time()) + 10)}
+    error = GithubException(403, "rate limited", headers=headers)
+
+    assert 0 < _retry_wait_time(error, attempt=1) <= 10
+
+
+def test_retry_wait_time_retry_after_http_date():
+    """Test that a Retry-After HTTP-date is turned into a wait in seconds."""
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+    error = GithubException(429, "slow down", headers={"retry-after": retry_at})
+
+    assert 25 < _retry_wait_time(error, attempt=1) <= 30
+
+
+def test_retry_wait_time_unparsable_retry_after_backs_off():
+    """Test that an unreadable Retry-After falls back to exponential backoff."""
+    error = GithubException(503, "unavailable", headers={"retry-after": "soon"})
+
+    assert 2 <= _retry_wait_time(error, attempt=1) < 3
+
+
+@pytest.mark.asyncio
+async def test_upload_to_github_async(tmp_path):
+    """Test async wrapper delegates to the sync convenience function."""
+    test_file = tmp_path / "test.png"
+
+    with patch("src.github_uploader.upload_to_github") as mock_upload:
+        mock_upload.return_value = "./screenshots/test.png"
+
+        result = await upload_to_github_async(
+            "token", "testuser", test_file, "screenshots/test.png"
+        )
+
+        assert result == "./screenshots/test.png"
+        mock_upload.assert_called_once_with(
+            "token", "testuser", test_file, "screenshots/test.png", None
+        )
@@ -1,262 +1,136 @@
 """Integration tests for the complete workflow."""
 
-import os
-from unittest.mock import MagicMock, patch
+import logging
+from types import SimpleNamespace
 
 import pytest
 
 from src.main import run_workflow
 
+# Real logger that swallows the workflow's output, standing in for setup_logging
+NULL_LOGGER = logging.getLogger("tests.null")
+NULL_LOGGER.addHandler(logging.NullHandler())
+NULL_LOGGER.propagate = False
+
+
+@pytest.fixture(scope="class", autouse=True)
+def _workflow_patches(class_mocker):
+    """Patch the workflow collaborators once per test class."""
+    class_mocker.patch("src.main.setup_logging", lambda level="INFO": NULL_LOGGER)
+    return SimpleNamespace(
+        capturer_class=class_mocker.patch("src.main.ScreenshotCapture"),
+        uploader_class=class_mocker.patch("src.github_uploader.GitHubUploader"),
+        readme_class=class_mocker.patch("src.readme_updater.ReadmeUpdater"),
+        cleanup=class_mocker.patch("src.main.cleanup_old_screenshots"),
+        project_root=class_mocker.patch("src.main.get_project_root"),
+    )
+
+
+@pytest.fixture
+def wf_mocks(_workflow_patches, monkeypatch, screenshot_path):
+    """Workflow mocks with a valid environment, reset after each test."""
+    monkeypatch.setenv("GITHUB_TOKEN", "test_token")
+    monkeypatch.setenv("GITHUB_USERNAME", "testuser")
+    monkeypatch.setenv("PROFILE_URL", "https://github.com/testuser")
+    monkeypatch.setenv("DRY_RUN", "false")
+    _workflow_patches.project_root.return_value = screenshot_path.parent.parent
+
+    yield _workflow_patches
+
+    for mock in vars(_workflow_patches).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="module")
+def screenshot_path(tmp_path_factory):
+    """Screenshot file the mocked capturer reports as written, created once per module."""
+    path = tmp_path_factory.mktemp("project") / "screenshots" / "test_screenshot.png"
+    path.parent.mkdir()
+    path.touch()
+    return path
+
 
 class TestIntegration:
     """Integration test cases for end-to-end workflow."""
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "DRY_RUN": "true",
-        },
-    )
-    @patch("src.main.ScreenshotCapture")
-    @patch("src.main.setup_logging")
-    def test_workflow_dry_run(self, mock_logging, mock_capturer_class, tmp_path):
+    def test_workflow_dry_run(self, wf_mocks, screenshot_path, monkeypatch):
         """Test complete workflow in dry-run mode."""
-        # Setup mocks
-        mock_logger = MagicMock()
-        mock_logging.return_value = mock_logger
-
-        mock_capturer = MagicMock()
-        screenshot_path = tmp_path / "screenshots" / "test_screenshot.png"
-        screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-        screenshot_path.touch()
+        monkeypatch.setenv("DRY_RUN", "true")
+        mock_capturer = wf_mocks.capturer_class.return_value
         mock_capturer.capture_sync.return_value = screenshot_path
-        mock_capturer_class.return_value = mock_capturer
 
         # Run workflow
-        with patch("src.main.get_project_root", return_value=tmp_path):
-            run_workflow(dry_run=True)
+        run_workflow(dry_run=True)
 
         # Assertions
         mock_capturer.capture_sync.assert_called_once()
         # In dry-run, upload and README update should not be called
+        wf_mocks.uploader_class.assert_not_called()
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "DRY_RUN": "false",
-        },
-    )
-    @patch("src.main.cleanup_old_screenshots")
-    @patch("src.main.ReadmeUpdater")
-    @patch("src.main.GitHubUploader")
-    @patch("src.main.ScreenshotCapture")
-    @patch("src.main.setup_logging")
-    def test_workflow_full_success(
-        self,
-        mock_logging,
-        mock_capturer_class,
-        mock_uploader_class,
-        mock_readme_updater_class,
-        mock_cleanup,
-        tmp_path,
-    ):
+    def test_workflow_full_success(self, wf_mocks, screenshot_path):
         """Test complete workflow with all steps."""
-        # Setup mocks
-        mock_logger = MagicMock()
-        mock_logging.return_value = mock_logger
-
         # Screenshot capture
-        mock_capturer = MagicMock()
-        screenshot_path = tmp_path / "screenshots" / "test_screenshot.png"
-        screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-        screenshot_path.touch()
+        mock_capturer = wf_mocks.capturer_class.return_value
         mock_capturer.capture_sync.return_value = screenshot_path
-        mock_capturer_class.return_value = mock_capturer
 
         # GitHub uploader
-        mock_uploader = MagicMock()
+        mock_uploader = wf_mocks.uploader_class.return_value
         mock_uploader.upload_screenshot.return_value = "./screenshots/test_screenshot.png"
-        mock_uploader_class.return_value = mock_uploader
 
-        # README updater
-        mock_readme_updater = MagicMock()
-        mock_readme_updater.update_readme.return_value = "![Profile Screenshot](./screenshots/test_screenshot.png)"
-        mock_readme_updater_class.return_value = mock_readme_updater
+        # README content
+        wf_mocks.readme_class.render_readme.return_value = (
+            "![Profile Screenshot](./screenshots/test_screenshot.png)"
+        )
 
         # Run workflow
-        with patch("src.main.get_project_root", return_value=tmp_path):
-            run_workflow(dry_run=False)
+        run_workflow(dry_run=False)
 
         # Assertions
         mock_capturer.capture_sync.assert_called_once()
         mock_uploader.upload_screenshot.assert_called_once()
-        mock_readme_updater.update_readme.assert_called_once()
-        mock_cleanup.assert_called_once()
-
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "DRY_RUN": "false",
-        },
-    )
-    @patch("src.main.ReadmeUpdater")
-    @patch("src.main.GitHubUploader")
-    @patch("src.main.ScreenshotCapture")
-    @patch("src.main.setup_logging")
-    def test_workflow_screenshot_failure(
-        self,
-        mock_logging,
-        mock_capturer_class,
-        mock_uploader_class,
-        mock_readme_updater_class,
-        tmp_path,
-    ):
-        """Test workflow when screenshot capture fails."""
-        # Setup mocks
-        mock_logger = MagicMock()
-        mock_logging.return_value = mock_logger
-
-        # Screenshot capture fails
-        mock_capturer = MagicMock()
-        mock_capturer.capture_sync.side_effect = Exception("Screenshot failed")
-        mock_capturer_class.return_value = mock_capturer
-
-        # Run workflow should raise exception
-        with patch("src.main.get_project_root", return_value=tmp_path):
-            with pytest.raises(Exception) as excinfo:
-                run_workflow(dry_run=False)
-
-        assert "Screenshot failed" in str(excinfo.value)
-
-        # Upload and README update should not be called
-        mock_uploader = mock_uploader_class.return_value
-        mock_uploader.upload_screenshot.assert_not_called()
-
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "DRY_RUN": "false",
-        },
+        # README is committed together with the screenshot, no separate update
+        extra_files = mock_uploader.upload_screenshot.call_args.kwargs["extra_files"]
+        assert extra_files == {
+            "README.md": b"![Profile Screenshot](./screenshots/test_screenshot.png)"
+        }
+        wf_mocks.readme_class.assert_not_called()
+        mock_uploader.connect.assert_called_once()
+        mock_uploader.close.assert_called_once()
+        wf_mocks.cleanup.assert_called_once()
+
+    @pytest.mark.parametrize(
+        ("collaborator", "method", "message", "upload_calls"),
+        [
+            ("capturer_class", "capture_sync", "Screenshot failed", 0),
+            ("uploader_class", "upload_screenshot", "Upload failed", 1),
+        ],
     )
-    @patch("src.main.ReadmeUpdater")
-    @patch("src.main.GitHubUploader")
-    @patch("src.main.ScreenshotCapture")
-    @patch("src.main.setup_logging")
-    def test_workflow_upload_failure(
-        self,
-        mock_logging,
-        mock_capturer_class,
-        mock_uploader_class,
-        mock_readme_updater_class,
-        tmp_path,
+    def test_workflow_step_failure(
+        self, wf_mocks, screenshot_path, collaborator, method, message, upload_calls
     ):
-        """Test workflow when upload fails."""
-        # Setup mocks
-        mock_logger = MagicMock()
-        mock_logging.return_value = mock_logger
-
-        # Screenshot capture succeeds
-        mock_capturer = MagicMock()
-        screenshot_path = tmp_path / "screenshots" / "test_screenshot.png"
-        screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-        screenshot_path.touch()
+        """Test that a failing step aborts the workflow and propagates its error."""
+        mock_capturer = wf_mocks.capturer_class.return_value
         mock_capturer.capture_sync.return_value = screenshot_path
-        mock_capturer_class.return_value = mock_capturer
 
-        # Upload fails
-        mock_uploader = MagicMock()
-        mock_uploader.upload_screenshot.side_effect = Exception("Upload failed")
-        mock_uploader_class.return_value = mock_uploader
+        # The chosen step fails
+        failing_instance = getattr(wf_mocks, collaborator).return_value
+        getattr(failing_instance, method).side_effect = Exception(message)
 
         # Run workflow should raise exception
-        with patch("src.main.get_project_root", return_value=tmp_path):
-            with pytest.raises(Exception) as excinfo:
-                run_workflow(dry_run=False)
-
-        assert "Upload failed" in str(excinfo.value)
-
-        # README update should not be called
-        mock_readme_updater = mock_readme_updater_class.return_value
-        mock_readme_updater.update_readme.assert_not_called()
-
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-            "DRY_RUN": "false",
-        },
-    )
-    @patch("src.main.cleanup_old_screenshots")
-    @patch("src.main.ReadmeUpdater")
-    @patch("src.main.GitHubUploader")
-    @patch("src.main.ScreenshotCapture")
-    @patch("src.main.setup_logging")
-    def test_workflow_readme_update_failure(
-        self,
-        mock_logging,
-        mock_capturer_class,
-        mock_uploader_class,
-        mock_readme_updater_class,
-        mock_cleanup,
-        tmp_path,
-    ):
-        """Test workflow when README update fails."""
-        # Setup mocks
-        mock_logger = MagicMock()
-        mock_logging.return_value = mock_logger
-
-        # Screenshot capture succeeds
-        mock_capturer = MagicMock()
-        screenshot_path = tmp_path / "screenshots" / "test_screenshot.png"
-        screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-        screenshot_path.touch()
-        mock_capturer.capture_sync.return_value = screenshot_path
-        mock_capturer_class.return_value = mock_capturer
-
-        # Upload succeeds
-        mock_uploader = MagicMock()
-        mock_uploader.upload_screenshot.return_value = "./screenshots/test.png"
-        mock_uploader_class.return_value = mock_uploader
-
-        # README update fails
-        mock_readme_updater = MagicMock()
-        mock_readme_updater.update_readme.side_effect = Exception("README update failed")
-        mock_readme_updater_class.return_value = mock_readme_updater
-
-        # Run workflow should raise exception
-        with patch("src.main.get_project_root", return_value=tmp_path):
-            with pytest.raises(Exception) as excinfo:
-                run_workflow(dry_run=False)
+        with pytest.raises(Exception, match=message):
+            run_workflow(dry_run=False)
 
-        assert "README update failed" in str(excinfo.value)
+        # No upload after a capture failure, and no separate README update either way
+        mock_uploader = wf_mocks.uploader_class.return_value
+        assert mock_uploader.upload_screenshot.call_count == upload_calls
+        wf_mocks.readme_class.return_value.update_readme.assert_not_called()
 
-    @patch.dict(
-        os.environ,
-        {
-            "GITHUB_TOKEN": "test_token",
-            "GITHUB_USERNAME": "testuser",
-            "PROFILE_URL": "https://github.com/testuser",
-        },
-    )
-    def test_workflow_missing_env_vars(self):
+    def test_workflow_missing_env_vars(self, wf_mocks, monkeypatch):
         """Test workflow with missing environment variables."""
         # Clear required env var
-        with patch.dict(os.environ, {"GITHUB_TOKEN": ""}, clear=False):
-            with pytest.raises(ValueError) as excinfo:
-                run_workflow()
+        monkeypatch.delenv("GITHUB_TOKEN")
+
+        with pytest.raises(ValueError) as excinfo:
+            run_workflow()
 
         assert "Missing required environment variables" in str(excinfo.value)
@@ -1,114 +1,198 @@
 """Unit tests for README updater module."""
 
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
+from github import Auth, GithubException
 
-from src.readme_updater import ReadmeUpdater, update_github_readme
+from src.readme_updater import ReadmeUpdater, update_github_readme, update_github_readme_async
+
+SCREENSHOT_FILENAME = "2026-01-10.png"
+EXPECTED_README = "![Profile Screenshot](./screenshots/2026-01-10.png)"
+
+
+@pytest.fixture(scope="module")
+def bare_updater():
+    """Unconnected updater shared by tests that only read its attributes."""
+    return ReadmeUpdater("test_token", "testuser")
+
+
+@pytest.fixture
+def readme_repo(github_mock):
+    """Profile repository holding an outdated README, reachable over REST only."""
+    github_mock.requester.graphql_query.side_effect = GithubException(502, "Bad Gateway")
+    mock_repo = MagicMock()
+    mock_repo.get_readme.return_value = SimpleNamespace(
+        sha="abc123", decoded_content=b"Current README content"
+    )
+    github_mock.get_repo.return_value = mock_repo
+    return mock_repo
 
 
 class TestReadmeUpdater:
     """Test cases for ReadmeUpdater class."""
 
-    def test_init(self):
+    def test_init(self, bare_updater):
         """Test initialization."""
-        updater = ReadmeUpdater("test_token", "testuser")
-        assert updater.token == "test_token"
-        assert updater.username == "testuser"
-        assert updater.github is None
-        assert updater.repo_name == "fUmar3542/fUmar3542"
+        assert bare_updater.token == "test_token"
+        assert bare_updater.username == "testuser"
+        assert bare_updater.github is None
+        assert bare_updater.repo_name == "fUmar3542/fUmar3542"
 
-    @patch("src.readme_updater.Github")
-    def test_connect_success(self, mock_github):
+    def test_connect_success(self, github_mock, readme_github):
         """Test successful GitHub connection."""
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
-
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github.return_value = mock_github_instance
-
         updater = ReadmeUpdater("test_token", "testuser")
         updater.connect()
 
         assert updater.github is not None
-        mock_github.assert_called_once_with("test_token")
+        readme_github.assert_called_once()
+        auth = readme_github.call_args.kwargs["auth"]
+        assert isinstance(auth, Auth.Token)
+        assert auth.token == "test_token"
 
-    @patch("src.readme_updater.Github")
-    def test_get_current_readme(self, mock_github):
+    def test_get_current_readme(self, readme_repo):
         """Test fetching current README."""
-        mock_readme = MagicMock()
-        mock_readme.decoded_content = b"Current README content"
+        updater = ReadmeUpdater("test_token", "testuser")
+        updater.connect()
+        readme = updater.get_current_readme()
 
-        mock_repo = MagicMock()
-        mock_repo.get_readme.return_value = mock_readme
+        assert readme == "Current README content"
+
+    def test_update_readme(self, readme_repo):
+        """Test updating README with screenshot."""
+        updater = ReadmeUpdater("test_token", "testuser")
+        updater.connect()
 
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
+        new_readme = updater.update_readme(SCREENSHOT_FILENAME)
 
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
+        assert "./screenshots/2026-01-10.png" in new_readme
+        assert "![Profile Screenshot]" in new_readme
+        readme_repo.update_file.assert_called_once()
+        assert readme_repo.update_file.call_args.kwargs["content"] == new_readme.encode("utf-8")
+
+    def test_update_readme_graphql(self, github_mock):
+        """Test README update through a single GraphQL commit."""
+        github_mock.requester.graphql_query.side_effect = [
+            (
+                {},
+                {
+                    "data": {
+                        "repository": {
+                            "defaultBranchRef": {"name": "main", "target": {"oid": "head123"}},
+                            "object": {"text": "Old README"},
+                        }
+                    }
+                },
+            ),
+            ({}, {"data": {"createCommitOnBranch": {"commit": {"oid": "commit123"}}}}),
+        ]
 
         updater = ReadmeUpdater("test_token", "testuser")
         updater.connect()
-        readme = updater.get_current_readme()
+        new_readme = updater.update_readme(SCREENSHOT_FILENAME)
+
+        assert new_readme == EXPECTED_README
+        state_call, commit_call = github_mock.requester.graphql_query.call_args_list
+        # Flat variables, as PyGithub 2.4+ sends them; 2.2/2.3 would wrap them in "input"
+        assert state_call.args[1] == {"owner": "fUmar3542", "name": "fUmar3542"}
+        assert list(commit_call.args[1]) == ["input"]
+        mutation_input = commit_call.args[1]["input"]
+        assert mutation_input["expectedHeadOid"] == "head123"
+        assert mutation_input["branch"]["branchName"] == "main"
+        github_mock.get_repo.assert_not_called()
+
+    def test_update_readme_graphql_failure_falls_back_to_rest(self, readme_repo):
+        """Test that a GraphQL error falls back to the REST update path."""
+        updater = ReadmeUpdater("test_token", "testuser")
+        updater.connect()
+        updater.update_readme(SCREENSHOT_FILENAME)
 
-        assert readme == "Current README content"
+        readme_repo.update_file.assert_called_once()
 
-    @patch("src.readme_updater.Github")
-    def test_update_readme(self, mock_github):
-        """Test updating README with screenshot."""
-        mock_readme = MagicMock()
-        mock_readme.sha = "abc123"
+    def test_update_readme_graphql_without_branch_uses_rest(self, github_mock, readme_repo):
+        """Test that a repository without a default branch is written through REST."""
+        github_mock.requester.graphql_query.side_effect = None
+        github_mock.requester.graphql_query.return_value = ({}, {"data": {"repository": None}})
 
-        mock_repo = MagicMock()
-        mock_repo.get_readme.return_value = mock_readme
-        mock_repo.update_file = MagicMock()
+        updater = ReadmeUpdater("test_token", "testuser")
+        updater.connect()
+        updater.update_readme(SCREENSHOT_FILENAME)
 
-        mock_user = MagicMock()
-        mock_user.login = "testuser"
+        github_mock.requester.graphql_query.assert_called_once()
+        readme_repo.update_file.assert_called_once()
 
-        mock_github_instance = MagicMock()
-        mock_github_instance.get_user.return_value = mock_user
-        mock_github_instance.get_repo.return_value = mock_repo
-        mock_github.return_value = mock_github_instance
+    def test_update_readme_unchanged_skips_write(self, readme_repo):
+        """Test that an identical README is not rewritten."""
+        readme_repo.get_readme.return_value = SimpleNamespace(
+            sha="abc123",
+            decoded_content=EXPECTED_README.encode("utf-8"),
+        )
 
         updater = ReadmeUpdater("test_token", "testuser")
         updater.connect()
+        new_readme = updater.update_readme(SCREENSHOT_FILENAME)
 
-        screenshot_url = "2026-01-10.png"
-        new_readme = updater.update_readme(screenshot_url)
+        assert new_readme == EXPECTED_README
+        readme_repo.update_file.assert_not_called()
+        readme_repo.create_file.assert_not_called()
 
-        assert "./screenshots/2026-01-10.png" in new_readme
-        assert "![Profile Screenshot]" in new_readme
-        mock_repo.update_file.assert_called_once()
+    def test_repo_and_user_handles_cached(self, github_mock, readme_repo):
+        """Test that user and repository are fetched only once per connection."""
+        updater = ReadmeUpdater("test_token", "testuser")
+        updater.connect()
+        updater.get_current_readme()
+        updater.update_readme(SCREENSHOT_FILENAME)
+
+        github_mock.get_user.assert_called_once()
+        github_mock.get_repo.assert_called_once_with("fUmar3542/fUmar3542")
+
+    def test_shared_client_not_recreated_or_closed(self, readme_github):
+        """Test that an injected client is reused and left open on close."""
+        shared_github = Mock()
+        shared_github.get_user.return_value = SimpleNamespace(login="testuser")
 
-    def test_format_screenshot_link(self):
+        updater = ReadmeUpdater("test_token", "testuser", github=shared_github)
+        updater.connect()
+        updater.close()
+
+        assert updater.github is shared_github
+        readme_github.assert_not_called()
+        shared_github.close.assert_not_called()
+
+    def test_format_screenshot_link(self, bare_updater):
         """Test screenshot link formatting with relative path."""
-        updater = ReadmeUpdater("test_token", "testuser")
-        link = updater._format_screenshot_link("2026-01-10.png")
+        link = bare_updater._format_screenshot_link(SCREENSHOT_FILENAME)
 
-        assert link == "![Profile Screenshot](./screenshots/2026-01-10.png)"
+        assert link == EXPECTED_README
         assert link.startswith("![Profile Screenshot](./screenshots/")
 
-    def test_profile_repo_constant(self):
+    def test_profile_repo_constant(self, bare_updater):
         """Test that profile repository is hardcoded."""
-        updater = ReadmeUpdater("test_token", "testuser")
-        assert updater.PROFILE_REPO == "fUmar3542/fUmar3542"
-        assert updater.repo_name == "fUmar3542/fUmar3542"
+        assert bare_updater.PROFILE_REPO == "fUmar3542/fUmar3542"
+        assert bare_updater.repo_name == "fUmar3542/fUmar3542"
 
 
 def test_update_github_readme_convenience_function():
     """Test convenience function for updating README."""
     with patch("src.readme_updater.ReadmeUpdater") as mock_updater_class:
-        mock_updater = MagicMock()
+        mock_updater = mock_updater_class.return_value.__enter__.return_value
         mock_updater.update_readme.return_value = "![Profile Screenshot](./screenshots/test.png)"
-        mock_updater_class.return_value = mock_updater
 
         result = update_github_readme("token", "user", "test.png")
 
         assert result == "![Profile Screenshot](./screenshots/test.png)"
         mock_updater.update_readme.assert_called_once_with("test.png")
-        mock_updater.close.assert_called_once()
+        mock_updater_class.return_value.__exit__.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_update_github_readme_async():
+    """Test async wrapper delegates to the sync convenience function."""
+    with patch("src.readme_updater.update_github_readme") as mock_update:
+        mock_update.return_value = "![Profile Screenshot](./screenshots/test.png)"
+
+        result = await update_github_readme_async("token", "user", "test.png")
+
+        assert result == "![Profile Screenshot](./screenshots/test.png)"
+        mock_update.assert_called_once_with("token", "user", "test.png")
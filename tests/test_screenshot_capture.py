@@ -1,10 +1,33 @@
 """Unit tests for screenshot capture module."""
 
+import asyncio
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from playwright.async_api import Error as PlaywrightError
 
-from src.screenshot_capture import ScreenshotCapture, capture_screenshot
+from src.screenshot_capture import ScreenshotCapture, _block_nonessential, capture_screenshot
+
+
+@pytest.fixture
+def playwright_mocks():
+    """Patched async_playwright whose Chromium hands out one browser, context and page."""
+    page, context, browser, playwright = AsyncMock(), AsyncMock(), AsyncMock(), AsyncMock()
+    context.new_page.return_value = page
+    browser.new_context.return_value = context
+    playwright.chromium.launch.return_value = browser
+    playwright.chromium.connect_over_cdp.return_value = browser
+    playwright.chromium.launch_persistent_context.return_value = context
+    with patch("src.screenshot_capture.async_playwright") as mock_async_playwright:
+        mock_async_playwright.return_value.start = AsyncMock(return_value=playwright)
+        yield SimpleNamespace(page=page, context=context, browser=browser, playwright=playwright)
+
+
+@pytest.fixture(scope="module")
+def capture_dir(tmp_path_factory):
+    """Output directory shared by tests whose screenshots are never written to disk."""
+    return tmp_path_factory.mktemp("captures")
 
 
 class TestScreenshotCapture:
@@ -25,27 +48,14 @@ class TestScreenshotCapture:
         assert capturer.quality == 95
 
     @pytest.mark.asyncio
-    @patch("src.screenshot_capture.async_playwright")
-    async def test_capture_success(self, mock_playwright, tmp_path):
+    async def test_capture_success(self, playwright_mocks, capture_dir):
         """Test successful screenshot capture."""
-        # Setup mocks
-        mock_page = AsyncMock()
-        mock_context = AsyncMock()
-        mock_browser = AsyncMock()
-
-        mock_browser.new_context.return_value = mock_context
-        mock_context.new_page.return_value = mock_page
-        mock_page.goto = AsyncMock()
-        mock_page.wait_for_selector = AsyncMock()
-        mock_page.screenshot = AsyncMock()
-
-        mock_playwright_instance = AsyncMock()
-        mock_playwright_instance.chromium.launch.return_value = mock_browser
-        mock_playwright.return_value.__aenter__.return_value = mock_playwright_instance
+        mock_page = playwright_mocks.page
+        chromium = playwright_mocks.playwright.chromium
 
         # Create capturer
         capturer = ScreenshotCapture()
-        output_path = tmp_path / "test_screenshot.png"
+        output_path = capture_dir / "test_screenshot.png"
 
         # Capture
         result = await capturer.capture("https://github.com/testuser", output_path)
@@ -53,57 +63,282 @@ class TestScreenshotCapture:
         # Assertions
         assert result == output_path
         mock_page.goto.assert_called_once()
+        assert mock_page.goto.call_args.kwargs["wait_until"] == "domcontentloaded"
         mock_page.wait_for_selector.assert_called_once()
+        mock_page.wait_for_load_state.assert_called_once()
+        assert mock_page.wait_for_load_state.call_args.args == ("load",)
+        mock_page.route.assert_called_once_with("**/*", _block_nonessential)
+        mock_page.add_style_tag.assert_called_once()
+        mock_page.evaluate.assert_not_called()
         mock_page.screenshot.assert_called_once()
-        mock_browser.close.assert_called_once()
+        playwright_mocks.context.close.assert_called_once()
+        assert "--disable-dev-shm-usage" in chromium.launch.call_args.kwargs["args"]
+        playwright_mocks.browser.close.assert_not_called()
+
+        await capturer.aclose()
+        playwright_mocks.browser.close.assert_called_once()
+        playwright_mocks.playwright.stop.assert_called_once()
 
     @pytest.mark.asyncio
-    @patch("src.screenshot_capture.async_playwright")
-    async def test_capture_navigation_failure(self, mock_playwright, tmp_path):
-        """Test screenshot capture with navigation failure."""
-        # Setup mocks
-        mock_page = AsyncMock()
-        mock_page.goto.side_effect = Exception("Navigation failed")
+    @patch("src.screenshot_capture.optimize_png")
+    async def test_capture_jpeg_uses_quality(self, mock_optimize, playwright_mocks, capture_dir):
+        """Test that a .jpg output is encoded as JPEG with the configured quality."""
+        capturer = ScreenshotCapture(quality=80)
+        await capturer.capture("https://github.com/testuser", capture_dir / "shot.jpg")
+
+        kwargs = playwright_mocks.page.screenshot.call_args.kwargs
+        assert kwargs["type"] == "jpeg"
+        assert kwargs["quality"] == 80
+        mock_optimize.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_capture_reuses_browser(self, playwright_mocks, capture_dir):
+        """Test that consecutive captures share one browser launch."""
+        capturer = ScreenshotCapture()
+        await capturer.capture("https://github.com/testuser", capture_dir / "first.png")
+        await capturer.capture("https://github.com/testuser", capture_dir / "second.png")
+
+        playwright_mocks.playwright.chromium.launch.assert_called_once()
+        assert playwright_mocks.browser.new_context.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_capture_persistent_profile(self, playwright_mocks, capture_dir):
+        """Test that a user data dir launches one persistent context and closes only pages."""
+        chromium = playwright_mocks.playwright.chromium
+        mock_context = playwright_mocks.context
+
+        profile_dir = capture_dir / "profile"
+        capturer = ScreenshotCapture(user_data_dir=profile_dir)
+        await capturer.capture("https://github.com/testuser", capture_dir / "first.png")
+        await capturer.capture("https://github.com/testuser", capture_dir / "second.png")
+
+        chromium.launch_persistent_context.assert_called_once()
+        assert chromium.launch_persistent_context.call_args.args == (str(profile_dir),)
+        chromium.launch.assert_not_called()
+        # Routing would turn off the HTTP cache the profile is kept for
+        playwright_mocks.page.route.assert_not_called()
+        assert playwright_mocks.page.close.call_count == 2
+        mock_context.close.assert_not_called()
 
-        mock_context = AsyncMock()
-        mock_context.new_page.return_value = mock_page
+        await capturer.aclose()
+        mock_context.close.assert_called_once()
 
-        mock_browser = AsyncMock()
-        mock_browser.new_context.return_value = mock_context
+    @pytest.mark.asyncio
+    async def test_capture_connects_over_cdp(self, playwright_mocks, capture_dir):
+        """Test that a CDP endpoint is connected to instead of launching Chromium."""
+        chromium = playwright_mocks.playwright.chromium
+
+        capturer = ScreenshotCapture(cdp_endpoint="http://localhost:9222")
+        await capturer.capture("https://github.com/testuser", capture_dir / "shot.png")
+
+        chromium.connect_over_cdp.assert_called_once_with("http://localhost:9222")
+        chromium.launch.assert_not_called()
+        playwright_mocks.browser.new_context.assert_called_once()
 
-        mock_playwright_instance = AsyncMock()
-        mock_playwright_instance.chromium.launch.return_value = mock_browser
-        mock_playwright.return_value.__aenter__.return_value = mock_playwright_instance
+    @pytest.mark.asyncio
+    async def test_capture_many(self, playwright_mocks, capture_dir):
+        """Test concurrent captures return paths in target order with one browser."""
+        targets = [
+            ("https://github.com/first", capture_dir / "first.png"),
+            ("https://github.com/second", capture_dir / "second.png"),
+        ]
+        capturer = ScreenshotCapture()
+        results = await capturer.capture_many(targets, concurrency=2)
+
+        assert results == [capture_dir / "first.png", capture_dir / "second.png"]
+        playwright_mocks.playwright.chromium.launch.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_capture_navigation_failure(self, playwright_mocks, capture_dir):
+        """Test screenshot capture with navigation failure."""
+        playwright_mocks.page.goto.side_effect = Exception("Navigation failed")
 
         # Create capturer
         capturer = ScreenshotCapture()
-        output_path = tmp_path / "test_screenshot.png"
+        output_path = capture_dir / "test_screenshot.png"
 
         # Should raise exception
         with pytest.raises(Exception) as excinfo:
             await capturer.capture("https://github.com/testuser", output_path)
 
         assert "Navigation failed" in str(excinfo.value)
+        playwright_mocks.context.close.assert_called_once()
 
-    @patch("src.screenshot_capture.asyncio.run")
-    def test_capture_sync(self, mock_asyncio_run, tmp_path):
+    @pytest.mark.asyncio
+    async def test_capture_new_page_failure_closes_context(self, playwright_mocks, capture_dir):
+        """Test that the context is closed even when opening the page fails."""
+        playwright_mocks.context.new_page.side_effect = Exception("Page crashed")
+
+        capturer = ScreenshotCapture()
+        with pytest.raises(Exception, match="Page crashed"):
+            await capturer.capture("https://github.com/testuser", capture_dir / "test.png")
+
+        playwright_mocks.context.close.assert_called_once()
+
+    def test_capture_sync(self, monkeypatch, capture_dir):
         """Test synchronous capture wrapper."""
-        output_path = tmp_path / "test_screenshot.png"
-        mock_asyncio_run.return_value = output_path
+        output_path = capture_dir / "test_screenshot.png"
+        calls = []
+
+        async def fake_capture(profile_url, path):
+            calls.append((profile_url, path))
+            return path
 
         capturer = ScreenshotCapture()
+        monkeypatch.setattr(capturer, "capture", fake_capture)
         result = capturer.capture_sync("https://github.com/testuser", output_path)
 
         assert result == output_path
-        mock_asyncio_run.assert_called_once()
+        assert calls == [("https://github.com/testuser", output_path)]
+
+    def test_capture_many_sync_twice(self, playwright_mocks, capture_dir):
+        """Test that the sync wrapper can run again after concurrent captures on a prior loop."""
+        targets = [
+            ("https://github.com/first", capture_dir / "first.png"),
+            ("https://github.com/second", capture_dir / "second.png"),
+        ]
+
+        async def slow_launch(**kwargs):
+            # Hold the browser lock across a suspension so the second capture contends
+            await asyncio.sleep(0)
+            return playwright_mocks.browser
 
-    @patch("src.screenshot_capture.ScreenshotCapture.capture_sync")
-    def test_capture_screenshot_function(self, mock_capture_sync, tmp_path):
+        playwright_mocks.playwright.chromium.launch.side_effect = slow_launch
+        capturer = ScreenshotCapture()
+
+        assert capturer.capture_many_sync(targets, concurrency=2) == [p for _, p in targets]
+        assert capturer.capture_many_sync(targets, concurrency=2) == [p for _, p in targets]
+        assert playwright_mocks.playwright.chromium.launch.call_count == 2
+
+    def test_capture_screenshot_function(self, monkeypatch, capture_dir):
         """Test convenience function for screenshot capture."""
-        output_path = tmp_path / "test_screenshot.png"
-        mock_capture_sync.return_value = output_path
+        output_path = capture_dir / "test_screenshot.png"
+        calls = []
 
+        def fake_capture_sync(capturer, profile_url, path):
+            calls.append((profile_url, path))
+            return path
+
+        monkeypatch.setattr(ScreenshotCapture, "capture_sync", fake_capture_sync)
         result = capture_screenshot("https://github.com/testuser", output_path)
 
         assert result == output_path
-        mock_capture_sync.assert_called_once()
+        assert calls == [("https://github.com/testuser", output_path)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("url", "resource_type", "blocked"),
+    [
+        ("https://collector.github.com/github/collect", "xhr", True),
+        ("https://github.githubassets.com/assets/mona-sans.woff2", "font", True),
+        ("https://github.com/testuser", "document", False),
+        ("https://avatars.githubusercontent.com/u/1", "image", False),
+    ],
+)
+async def test_block_nonessential(url, resource_type, blocked):
+    """Test that only non-essential requests are aborted."""
+    route = AsyncMock()
+    route.request = SimpleNamespace(url=url, resource_type=resource_type)
+
+    await _block_nonessential(route)
+
+    assert route.abort.called is blocked
+    assert route.continue_.called is not blocked
+
+
+@pytest.mark.asyncio
+async def test_route_request_caches_static_assets(tmp_path):
+    """Test that GitHub bundles are fetched once and then served from disk."""
+    url = "https://github.githubassets.com/assets/app-abc123.js"
+    capturer = ScreenshotCapture(asset_cache_dir=tmp_path)
+
+    response = AsyncMock(ok=True)
+    response.body.return_value = b"console.log(1)"
+    miss = AsyncMock()
+    miss.request = SimpleNamespace(url=url, resource_type="script")
+    miss.fetch.return_value = response
+
+    await capturer._route_request(miss)
+
+    miss.fulfill.assert_called_once_with(response=response, body=b"console.log(1)")
+
+    hit = AsyncMock()
+    hit.request = SimpleNamespace(url=url, resource_type="script")
+
+    await capturer._route_request(hit)
+
+    hit.fetch.assert_not_called()
+    kwargs = hit.fulfill.call_args.kwargs
+    assert kwargs["body"] == b"console.log(1)"
+    assert "javascript" in kwargs["headers"]["content-type"]
+
+
+@pytest.mark.asyncio
+async def test_route_request_passes_through_other_requests(tmp_path):
+    """Test that non-asset requests fall back to the blocking filter."""
+    capturer = ScreenshotCapture(asset_cache_dir=tmp_path)
+    route = AsyncMock()
+    route.request = SimpleNamespace(url="https://github.com/testuser", resource_type="document")
+
+    await capturer._route_request(route)
+
+    route.continue_.assert_called_once()
+    route.fetch.assert_not_called()
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_route_request_continues_when_fetch_fails(tmp_path):
+    """Test that a failed asset fetch hands the request back to the browser uncached."""
+    capturer = ScreenshotCapture(asset_cache_dir=tmp_path)
+    route = AsyncMock()
+    route.request = SimpleNamespace(
+        url="https://github.githubassets.com/assets/app-abc123.js", resource_type="script"
+    )
+    route.fetch.side_effect = PlaywrightError("net::ERR_CONNECTION_RESET")
+
+    await capturer._route_request(route)
+
+    route.continue_.assert_called_once()
+    route.fulfill.assert_not_called()
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_route_request_concurrent_misses(tmp_path):
+    """Test that two captures missing on the same bundle both get it and cache it once."""
+    url = "https://github.githubassets.com/assets/app-abc123.js"
+    capturer = ScreenshotCapture(asset_cache_dir=tmp_path)
+
+    routes = []
+    for _ in range(2):
+        response = AsyncMock(ok=True)
+        response.body.return_value = b"console.log(1)"
+        route = AsyncMock()
+        route.request = SimpleNamespace(url=url, resource_type="script")
+        route.fetch.return_value = response
+        routes.append(route)
+
+    await asyncio.gather(*(capturer._route_request(route) for route in routes))
+
+    for route in routes:
+        route.fulfill.assert_called_once()
+    assert [path.read_bytes() for path in tmp_path.iterdir()] == [b"console.log(1)"]
+
+
+@pytest.mark.asyncio
+async def test_route_request_fulfills_when_cache_write_fails(tmp_path):
+    """Test that an unwritable cache still serves the fetched asset."""
+    capturer = ScreenshotCapture(asset_cache_dir=tmp_path / "missing")
+    response = AsyncMock(ok=True)
+    response.body.return_value = b"console.log(1)"
+    route = AsyncMock()
+    route.request = SimpleNamespace(
+        url="https://github.githubassets.com/assets/app-abc123.js", resource_type="script"
+    )
+    route.fetch.return_value = response
+
+    await capturer._route_request(route)
+
+    route.fulfill.assert_called_once_with(response=response, body=b"console.log(1)")
@@ -1,7 +1,13 @@
 """Unit tests for utility functions."""
 
 import logging
-from unittest.mock import MagicMock, patch
+import os
+import re
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
 
 from src.utils import (
     cleanup_old_screenshots,
@@ -9,9 +15,25 @@ from src.utils import (
     generate_screenshot_filename,
     generate_timestamp,
     get_project_root,
+    optimize_png,
     setup_logging,
 )
 
+DATE_PNG = re.compile(r"\d{4}-\d{2}-\d{2}\.png")
+
+
+def _cleanup_files(directory, names, keep_count):
+    """Run cleanup_old_screenshots over empty files created oldest first.
+
+    Returns the names that were deleted.
+    """
+    for mtime, name in enumerate(names, start=1):
+        path = directory / name
+        path.touch()
+        os.utime(path, (mtime, mtime))
+    cleanup_old_screenshots(directory, keep_count=keep_count)
+    return [name for name in names if not (directory / name).exists()]
+
 
 class TestUtils:
     """Test cases for utility functions."""
@@ -33,12 +55,10 @@ class TestUtils:
         assert len(timestamp) == 19  # YYYY-MM-DD-HH-MM-SS
         assert timestamp.count("-") == 5
 
-    @patch("src.utils.datetime")
-    def test_generate_timestamp_fixed_time(self, mock_datetime):
+    @patch("src.utils.localtime")
+    def test_generate_timestamp_fixed_time(self, mock_localtime):
         """Test timestamp generation with fixed time."""
-        mock_now = MagicMock()
-        mock_now.strftime.return_value = "2024-01-15-10-30-45"
-        mock_datetime.now.return_value = mock_now
+        mock_localtime.return_value = time.struct_time((2024, 1, 15, 10, 30, 45, 0, 15, 0))
 
         timestamp = generate_timestamp()
         assert timestamp == "2024-01-15-10-30-45"
@@ -47,10 +67,7 @@ class TestUtils:
         """Test screenshot filename generation with default timestamp."""
         filename = generate_screenshot_filename()
         # New format: YYYY-MM-DD.png (shorter for bio URLs)
-        assert filename.endswith(".png")
-        assert len(filename) == 14  # YYYY-MM-DD.png
-        # Should match date pattern
-        assert filename[4] == "-" and filename[7] == "-"
+        assert DATE_PNG.fullmatch(filename)
 
     def test_generate_screenshot_filename_custom_timestamp(self):
         """Test screenshot filename generation with custom timestamp."""
@@ -58,6 +75,11 @@ class TestUtils:
         filename = generate_screenshot_filename("2024-01-15-10-30-45")
         assert filename == "2024-01-15.png"
 
+    def test_generate_screenshot_filename_jpeg(self):
+        """Test screenshot filename generation with a JPEG extension."""
+        filename = generate_screenshot_filename("2024-01-15-10-30-45", extension="jpg")
+        assert filename == "2024-01-15.jpg"
+
     def test_ensure_directory_exists_new(self, tmp_path):
         """Test directory creation when it doesn't exist."""
         test_dir = tmp_path / "test" / "nested" / "dir"
@@ -72,6 +94,27 @@ class TestUtils:
         ensure_directory_exists(test_dir)  # Should not raise
         assert test_dir.exists()
 
+    def test_ensure_directory_exists_skips_known(self, tmp_path):
+        """Test repeated calls for the same directory do not hit the filesystem."""
+        test_dir = tmp_path / "repeated"
+        ensure_directory_exists(test_dir)
+        with patch.object(Path, "mkdir") as mock_mkdir:
+            ensure_directory_exists(test_dir)
+        mock_mkdir.assert_not_called()
+
+    def test_optimize_png_lossless(self, tmp_path):
+        """Test PNG recompression keeps pixels and does not grow the file."""
+        png_path = tmp_path / "screenshot.png"
+        Image.new("RGB", (200, 100), (255, 255, 255)).save(png_path, compress_level=0)
+        original_size = png_path.stat().st_size
+
+        optimize_png(png_path)
+
+        assert png_path.stat().st_size <= original_size
+        with Image.open(png_path) as image:
+            assert image.size == (200, 100)
+            assert image.getpixel((0, 0)) == (255, 255, 255)
+
     def test_get_project_root(self):
         """Test getting project root directory."""
         root = get_project_root()
@@ -85,59 +128,43 @@ class TestUtils:
 
     def test_cleanup_old_screenshots_keep_recent(self, tmp_path):
         """Test cleanup keeps most recent screenshots."""
-        # Create test screenshots
-        screenshots_dir = tmp_path / "screenshots"
-        screenshots_dir.mkdir()
-
-        screenshot_files = []
-        for i in range(10):
-            screenshot = screenshots_dir / f"screenshot-2024-01-{i+1:02d}-00-00-00.png"
-            screenshot.touch()
-            screenshot_files.append(screenshot)
+        names = [f"screenshot-2024-01-{i+1:02d}-00-00-00.png" for i in range(10)]
 
         # Cleanup, keeping only 5
-        cleanup_old_screenshots(screenshots_dir, keep_count=5)
+        removed = _cleanup_files(tmp_path, names, keep_count=5)
 
-        # Check that only 5 remain
-        remaining = list(screenshots_dir.glob("screenshot-*.png"))
-        assert len(remaining) == 5
+        # The 5 oldest are removed
+        assert sorted(removed) == names[:5]
 
     def test_cleanup_old_screenshots_fewer_than_keep_count(self, tmp_path):
         """Test cleanup when fewer screenshots than keep count."""
-        screenshots_dir = tmp_path / "screenshots"
-        screenshots_dir.mkdir()
-
-        # Create 3 screenshots
-        for i in range(3):
-            screenshot = screenshots_dir / f"screenshot-{i}.png"
-            screenshot.touch()
-
-        # Try to keep 5
-        cleanup_old_screenshots(screenshots_dir, keep_count=5)
+        names = [f"screenshot-{i}.png" for i in range(3)]
 
-        # All 3 should remain
-        remaining = list(screenshots_dir.glob("screenshot-*.png"))
-        assert len(remaining) == 3
+        # Try to keep 5, all 3 should remain
+        assert _cleanup_files(tmp_path, names, keep_count=5) == []
 
     def test_cleanup_old_screenshots_ignores_other_files(self, tmp_path):
         """Test cleanup ignores files that don't match pattern."""
+        # The non-screenshot file is the oldest, so it would go first if matched
+        names = ["other.png"] + [f"screenshot-{i}.png" for i in range(5)]
+
+        removed = _cleanup_files(tmp_path, names, keep_count=2)
+
+        assert "other.png" not in removed
+        assert len(removed) == 3
+
+    def test_cleanup_old_screenshots_removes_oldest(self, tmp_path):
+        """Test cleanup deletes the oldest files across both filename formats."""
         screenshots_dir = tmp_path / "screenshots"
         screenshots_dir.mkdir()
 
-        # Create screenshots
-        for i in range(5):
-            screenshot = screenshots_dir / f"screenshot-{i}.png"
+        names = ["screenshot-old.png", "2024-01-01.png", "2024-01-02.png", "2024-01-03.png"]
+        for mtime, name in enumerate(names, start=1):
+            screenshot = screenshots_dir / name
             screenshot.touch()
+            os.utime(screenshot, (mtime, mtime))
 
-        # Create other files
-        other = screenshots_dir / "other.png"
-        other.touch()
-
-        # Cleanup
         cleanup_old_screenshots(screenshots_dir, keep_count=2)
 
-        # Check other file still exists
-        assert other.exists()
-        # Check only 2 screenshots remain
-        screenshots = list(screenshots_dir.glob("screenshot-*.png"))
-        assert len(screenshots) == 2
+        remaining = sorted(p.name for p in screenshots_dir.iterdir())
+        assert remaining == ["2024-01-02.png", "2024-01-03.png"]